@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Offline analysis helpers for QueueGuidance Web
+Compact per-sample time series of queue counts and progress reporting for the UI
+"""
+
+import re
+import json
+import time
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from publisher import write_atomic
+
+
+def analysis_output_path(data_dir: Path, video_path: str) -> Path:
+    """Default time-series file for a video: data/analysis_<video name>.npz"""
+    # Glob patterns and URLs don't make clean file names
+    name = re.sub(r'[^\w.-]+', '_', Path(video_path).stem).strip('_') or 'source'
+    return Path(data_dir) / f"analysis_{name}.npz"
+
+
+class TimeSeriesRecorder:
+    """Accumulates one row per processed frame and saves them as compressed arrays"""
+    
+    def __init__(self, num_queues: int):
+        self.num_queues = num_queues
+        self.frame_index: List[int] = []
+        self.timestamps: List[float] = []
+        self.counts: List[List[int]] = []
+        self.smoothed: List[List[int]] = []
+        self.expected_waits: List[List[float]] = []
+    
+    def __len__(self):
+        return len(self.frame_index)
+    
+    def add(self, frame_index: int, timestamp: float, counts: List[int], smoothed: List[int],
+            expected_waits: Optional[List[float]] = None):
+        self.frame_index.append(frame_index)
+        self.timestamps.append(timestamp)
+        self.counts.append(counts)
+        self.smoothed.append(smoothed)
+        self.expected_waits.append(expected_waits if expected_waits is not None else [np.nan] * self.num_queues)
+    
+    def arrays(self) -> Dict[str, np.ndarray]:
+        z = self.num_queues
+        return {
+            'frame_index': np.asarray(self.frame_index, dtype=np.int64),
+            'timestamps': np.asarray(self.timestamps, dtype=np.float64),
+            'counts': np.asarray(self.counts, dtype=np.int16).reshape(-1, z),
+            'smoothed': np.asarray(self.smoothed, dtype=np.int16).reshape(-1, z),
+            'expected_wait_minutes': np.asarray(self.expected_waits, dtype=np.float32).reshape(-1, z),
+        }
+
+
+def merge_series(pieces: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Concatenate per-segment series in frame order, dropping any duplicate frames"""
+    merged = {key: np.concatenate([piece[key] for piece in pieces]) for key in pieces[0]}
+    order = np.argsort(merged['frame_index'], kind='stable')
+    _, first = np.unique(merged['frame_index'][order], return_index=True)
+    keep = order[first]
+    return {key: values[keep] for key, values in merged.items()}
+
+
+def replay_waits(smoothed: np.ndarray, timestamps: np.ndarray, service_rates) -> np.ndarray:
+    """Expected waits per sample from smoothed counts (no tracked exits, so the per-person estimate)"""
+    waits = np.empty(smoothed.shape, dtype=np.float32)
+    for i, (counts, ts) in enumerate(zip(smoothed.tolist(), timestamps.tolist())):
+        waits[i] = [round(w, 1) for w in service_rates.expected_waits(counts, ts)]
+    return waits
+
+
+def replay_counts(series: Dict[str, np.ndarray], smoother, service_rates) -> Dict[str, np.ndarray]:
+    """Recompute smoothed counts and expected waits from raw counts in timestamp order"""
+    smoothed = np.array([smoother.update(counts) for counts in series['counts'].tolist()],
+                        dtype=series['counts'].dtype).reshape(series['counts'].shape)
+    waits = replay_waits(smoothed, series['timestamps'], service_rates)
+    return dict(series, smoothed=smoothed, expected_wait_minutes=waits)
+
+
+def rank_series(keys: np.ndarray, counts: np.ndarray, hysteresis: float = 0.0):
+    """1-based best and worst queue per sample, as WebQueueDetector.rank_queues would pick them"""
+    best = np.argmin(keys, axis=1)
+    worst = np.argmax(keys, axis=1)
+    if hysteresis > 0:
+        previous = None
+        for i in range(len(keys)):
+            if counts[i].sum() == 0:
+                continue
+            if previous is not None and keys[i, previous] - keys[i, best[i]] <= hysteresis:
+                best[i] = previous
+            previous = best[i]
+    empty = counts.sum(axis=1) == 0
+    best[empty] = 0
+    worst[empty] = 0
+    return (best + 1).astype(np.int16), (worst + 1).astype(np.int16)
+
+
+def save_timeseries(path: Path, series: Dict[str, np.ndarray], metadata: Dict):
+    """Write the time series as a compressed .npz with JSON metadata"""
+    np.savez_compressed(path, metadata=np.array(json.dumps(metadata)), **series)
+
+
+def load_timeseries(path: Path) -> Dict:
+    """Read a time series written by save_timeseries"""
+    with np.load(path) as data:
+        series = {key: data[key] for key in data.files if key != 'metadata'}
+        series['metadata'] = json.loads(str(data['metadata']))
+    return series
+
+
+def summarize(series: Dict[str, np.ndarray], elapsed: float) -> Dict:
+    """Per-queue summary of an analysed video"""
+    counts, smoothed, timestamps = series['counts'], series['smoothed'], series['timestamps']
+    samples = len(timestamps)
+    queues = []
+    for i in range(counts.shape[1]):
+        peak = int(np.argmax(smoothed[:, i])) if samples else 0
+        queues.append({
+            'queue': i + 1,
+            'mean_count': round(float(smoothed[:, i].mean()), 2) if samples else 0.0,
+            'max_count': int(smoothed[:, i].max()) if samples else 0,
+            'peak_time_seconds': round(float(timestamps[peak]), 2) if samples else None,
+        })
+    duration = float(timestamps[-1] - timestamps[0]) if samples > 1 else 0.0
+    return {
+        'samples': samples,
+        'video_seconds': round(duration, 2),
+        'elapsed_seconds': round(elapsed, 2),
+        'realtime_factor': round(duration / elapsed, 2) if elapsed > 0 else None,
+        'queues': queues,
+    }
+
+
+def print_summary(summary: Dict, output_path: Path):
+    """Console summary at the end of an analysis"""
+    print(f"✅ Analysis complete: {summary['samples']} samples over {summary['video_seconds']}s of video "
+          f"in {summary['elapsed_seconds']}s (x{summary['realtime_factor']} real time)")
+    for queue in summary['queues']:
+        print(f"  Q{queue['queue']}: mean {queue['mean_count']} | max {queue['max_count']} "
+              f"at {queue['peak_time_seconds']}s")
+    print(f"💾 Time series saved to {output_path}")
+
+
+class ProgressReporter:
+    """Periodically writes analysis progress (fps, ETA) for the UI to poll"""
+    
+    def __init__(self, path: Path, video_path: str, total_frames: int, interval: float = 1.0):
+        self.path = Path(path)
+        self.video_path = video_path
+        self.total_frames = total_frames
+        self.interval = interval
+        self.started = time.time()
+        self._last_write = 0.0
+    
+    def _write(self, payload: Dict):
+        payload.update(video_path=self.video_path, updated=time.time())
+        write_atomic(self.path, json.dumps(payload, indent=2).encode())
+    
+    def update(self, frames_done: int, force: bool = False) -> Dict:
+        """Report progress at most once per interval"""
+        now = time.time()
+        elapsed = now - self.started
+        fps = frames_done / elapsed if elapsed > 0 else 0.0
+        remaining = max(0, self.total_frames - frames_done)
+        progress = {
+            'status': 'running',
+            'frames_done': frames_done,
+            'total_frames': self.total_frames,
+            'progress': round(frames_done / self.total_frames, 4) if self.total_frames else None,
+            'fps': round(fps, 1),
+            'eta_seconds': round(remaining / fps, 1) if fps > 0 and self.total_frames else None,
+        }
+        if force or now - self._last_write >= self.interval:
+            self._write(progress)
+            self._last_write = now
+        return progress
+    
+    def finish(self, output: str, summary: Dict):
+        self._write({'status': 'done', 'progress': 1.0, 'output': output, 'summary': summary})
+    
+    def fail(self, error: str):
+        self._write({'status': 'error', 'error': error})
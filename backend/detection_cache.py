@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Detection cache for QueueGuidance Web
+Stores per-frame person boxes of a video file in sidecar .npz shards under data/,
+so looped and re-analysed videos skip inference on frames already seen
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import hashlib
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+from publisher import write_atomic
+
+
+def video_fingerprint(path: str, samples: int = 16, chunk: int = 1 << 16) -> str:
+    """Content hash of a video from its size and evenly spaced chunks (fast on large files)"""
+    size = os.path.getsize(path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(path, 'rb') as f:
+        for i in range(samples):
+            f.seek(max(0, size - chunk) * i // max(1, samples - 1))
+            digest.update(f.read(chunk))
+    return digest.hexdigest()
+
+
+def _read_shard(path: Path):
+    with np.load(path) as data:
+        return data['frames'], data['offsets'], data['boxes'], json.loads(str(data['metadata']))
+
+
+def cache_shards(path: Path) -> List[Path]:
+    """Shard files of a cache, oldest first (each flush appends one shard)"""
+    path = Path(path)
+    return sorted(path.parent.glob(f"{path.name}.*.npz"))
+
+
+def read_cache(path: Path):
+    """(frames, offsets, boxes, metadata) of a cache; boxes of frames[i] are boxes[offsets[i]:offsets[i+1]]"""
+    entries, metadata = {}, {}
+    for shard in cache_shards(path):
+        try:
+            frames, offsets, boxes, metadata = _read_shard(shard)
+        except (OSError, ValueError, KeyError):
+            # Unreadable shard (or compacted away meanwhile): skip it
+            continue
+        for i, frame in enumerate(frames):
+            entries.setdefault(int(frame), boxes[offsets[i]:offsets[i + 1]])
+    return _pack(entries) + (metadata,)
+
+
+def _pack(entries: Dict[int, np.ndarray]):
+    frames = np.asarray(sorted(entries), dtype=np.int64)
+    parts = [entries[int(frame)] for frame in frames]
+    offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(part) for part in parts])
+    boxes = np.concatenate(parts) if parts else np.zeros((0, 5), np.float32)
+    return frames, offsets, boxes
+
+
+def find_cache(cache_dir: Path, video_path: str) -> Optional[Path]:
+    """Most recently used detection cache of a video, if any"""
+    prefix = video_fingerprint(video_path)[:12]
+    shards = sorted(Path(cache_dir).glob(f"{prefix}_*.*.npz"), key=lambda p: p.stat().st_mtime)
+    return shards[-1].with_name(shards[-1].name.split('.')[0]) if shards else None
+
+
+class DetectionCache:
+    """Per-frame (N, 5) [x1, y1, x2, y2, conf] boxes for one video and one set of detector settings.
+
+    The cache name is derived from the video content and the settings, so changing
+    either starts a new cache; caches of the same video with other settings are
+    deleted as stale. Each flush appends a shard with only the new frames, and
+    loading compacts shards once there are more than max_shards. The cache
+    directory is kept under max_bytes by evicting the least recently used files.
+    """
+
+    def __init__(self, cache_dir: Path, video_path: str, settings: Dict,
+                 max_bytes: int = 256 * 1024 * 1024, flush_every: int = 2000, max_shards: int = 32):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.flush_every = flush_every
+        self.max_shards = max_shards
+
+        self.fingerprint = video_fingerprint(video_path)
+        self.settings = settings
+        key = hashlib.sha1(json.dumps({'video': self.fingerprint, **settings}, sort_keys=True).encode())
+        self.prefix = f"{self.fingerprint[:12]}_"
+        self.path = self.cache_dir / f"{self.prefix}{key.hexdigest()[:12]}"
+
+        self.entries: Dict[int, np.ndarray] = {}
+        self.hits = 0
+        self.misses = 0
+        self._unsaved: Dict[int, np.ndarray] = {}
+        self._bytes = 0
+        self.full = False
+
+        self._invalidate_stale()
+        self.entries = self._load()
+        self._bytes = sum(boxes.nbytes + 8 for boxes in self.entries.values())
+
+    def _owns(self, path: Path) -> bool:
+        return path.name.startswith(self.path.name + '.')
+
+    def _invalidate_stale(self):
+        """Remove caches of this video made with different detector settings"""
+        for other in self.cache_dir.glob(f"{self.prefix}*.npz"):
+            if not self._owns(other):
+                other.unlink(missing_ok=True)
+
+    def _load(self) -> Dict[int, np.ndarray]:
+        shards = cache_shards(self.path)
+        entries = {}
+        for shard in shards:
+            try:
+                frames, offsets, boxes, metadata = _read_shard(shard)
+            except (OSError, ValueError, KeyError):
+                # Unreadable shard, or compacted by another process meanwhile
+                continue
+            if metadata.get('settings') != self.settings or metadata.get('video') != self.fingerprint:
+                continue
+            shard.touch()
+            for i, frame in enumerate(frames):
+                entries.setdefault(int(frame), boxes[offsets[i]:offsets[i + 1]])
+        if len(shards) > self.max_shards:
+            # Merge into one shard first, then drop the old ones, so readers never miss frames
+            self._write_shard(entries)
+            for shard in shards:
+                shard.unlink(missing_ok=True)
+        return entries
+
+    def _write_shard(self, entries: Dict[int, np.ndarray]):
+        """Write entries as a new shard; the name is unique per process and flush"""
+        frames, offsets, boxes = _pack(entries)
+        buffer = io.BytesIO()
+        np.savez(buffer, frames=frames, offsets=offsets, boxes=boxes,
+                 metadata=np.array(json.dumps({'video': self.fingerprint, 'settings': self.settings,
+                                               'updated': time.time()})))
+        write_atomic(self.path.with_name(f"{self.path.name}.{time.time_ns():x}-{os.getpid()}.npz"),
+                     buffer.getvalue())
+
+    def get(self, frame_index: Optional[int]) -> Optional[np.ndarray]:
+        boxes = self.entries.get(frame_index) if frame_index is not None else None
+        if boxes is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return boxes.copy()
+
+    def put(self, frame_index: Optional[int], boxes: np.ndarray):
+        if frame_index is None or frame_index in self.entries:
+            return
+        if self._bytes + boxes.nbytes + 8 > self.max_bytes:
+            self.full = True
+            return
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 5).copy()
+        self.entries[frame_index] = boxes
+        self._unsaved[frame_index] = boxes
+        self._bytes += boxes.nbytes + 8
+        if len(self._unsaved) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Append the frames added since the last flush as a new shard"""
+        if not self._unsaved:
+            return
+        self._write_shard(self._unsaved)
+        self._unsaved = {}
+        self._enforce_limit()
+
+    def _enforce_limit(self):
+        """Evict least recently used cache files until the directory fits in max_bytes"""
+        files = sorted(self.cache_dir.glob('*.npz'), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        for path in files:
+            if total <= self.max_bytes or self._owns(path):
+                continue
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+
+    def status(self) -> str:
+        """Short hit-rate summary for the console"""
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return f"{len(self.entries)} frames cached, {rate:.0%} hit rate"
@@ -15,19 +15,136 @@ from collections import deque
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime
 import threading
+import queue
 
 # Add parent QueueGuidance directory to path
 queue_guidance_path = Path(__file__).parent.parent.parent / 'QueueGuidance'
 sys.path.insert(0, str(queue_guidance_path))
 
 try:
-    from ultralytics import YOLO
     from config_manager import get_config_manager
     from professional_audio import get_audio_system
 except ImportError as e:
     print(f"Import error: {e}")
     print(f"Please ensure QueueGuidance folder is at: {queue_guidance_path}")
 
+# Sibling backend modules
+sys.path.insert(0, str(Path(__file__).parent))
+from zones import ZoneMask, zones_bounding_rect
+from motion_gate import MotionGate
+from tiling import tile_grid, merge_tile_boxes
+from inference_backends import BACKENDS, create_backend
+from tracking import PersonTracker
+from queue_stats import QueueDwellStats, ServiceRateEstimator
+from smoothing import CountSmoother, FILTERS
+from frame_sources import open_frame_source, PlaybackPacer, PACING_MODES, VideoFileSource
+from detection_cache import DetectionCache
+from rezone import StoredDetections
+from publisher import CoalescingPublisher, write_atomic
+from analysis import (TimeSeriesRecorder, ProgressReporter, analysis_output_path,
+                      save_timeseries, summarize, print_summary)
+
+def default_model_path() -> str:
+    """YOLO weights to use: yolov8s.pt, falling back to yolov8m.pt"""
+    model_path = str(queue_guidance_path / 'yolov8s.pt')
+    if not os.path.exists(model_path):
+        model_path = str(queue_guidance_path / 'yolov8m.pt')
+    return model_path
+
+
+class FrameQueue:
+    """Bounded hand-off queue between pipeline stages"""
+    
+    def __init__(self, maxsize: int = 2, drop_oldest: bool = True):
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+        self.drop_oldest = drop_oldest
+        self.dropped = 0
+    
+    def put(self, item, should_continue=lambda: True) -> bool:
+        """Enqueue an item, dropping the oldest one or waiting when full"""
+        while should_continue():
+            try:
+                self._queue.put(item, block=not self.drop_oldest, timeout=0.1)
+                return True
+            except queue.Full:
+                if self.drop_oldest:
+                    try:
+                        self._queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+        return False
+    
+    def get(self, timeout: float = 0.1):
+        """Dequeue the next item, or None if nothing arrived in time"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class FrameScheduler:
+    """Picks how many source frames to skip so inference keeps pace with the video"""
+    
+    def __init__(self, target_fps: Optional[float] = None, initial_stride: int = 2,
+                 smoothing: float = 0.2, adaptive: bool = True):
+        # target_fps=None means "as many inferences per second as the box can do"
+        self.target_fps = target_fps
+        self.initial_stride = initial_stride
+        # adaptive=False always uses initial_stride (offline analysis)
+        self.adaptive = adaptive
+        self.smoothing = smoothing
+        self.latency = None
+        self._inference_times = deque(maxlen=30)
+        self._next_slot = 0.0
+    
+    def record_inference(self, seconds: float, frames: int = 1):
+        """Feed the measured wall time of one inference call"""
+        per_frame = seconds / max(1, frames)
+        if self.latency is None:
+            self.latency = per_frame
+        else:
+            self.latency += self.smoothing * (per_frame - self.latency)
+        now = time.time()
+        for _ in range(frames):
+            self._inference_times.append(now)
+    
+    def planned_fps(self) -> Optional[float]:
+        """Inferences per second we aim for given the target and measured latency"""
+        if self.latency is None:
+            return self.target_fps
+        achievable = 1.0 / max(self.latency, 1e-6)
+        return min(achievable, self.target_fps) if self.target_fps else achievable
+    
+    def current_fps(self) -> float:
+        """Measured inferences per second over the recent window"""
+        if len(self._inference_times) < 2:
+            return 0.0
+        span = self._inference_times[-1] - self._inference_times[0]
+        return (len(self._inference_times) - 1) / span if span > 0 else 0.0
+    
+    def wait_for_slot(self):
+        """Block until the next inference slot so we don't exceed target_fps"""
+        if not self.target_fps:
+            return
+        now = time.time()
+        if self._next_slot > now:
+            time.sleep(self._next_slot - now)
+        self._next_slot = max(now, self._next_slot) + 1.0 / self.target_fps
+    
+    def stride(self, source_fps: float) -> int:
+        """Process 1 of every N source frames"""
+        planned = self.planned_fps()
+        if not self.adaptive or planned is None or self.latency is None or not source_fps:
+            return self.initial_stride
+        return max(1, int(np.ceil(source_fps / planned - 1e-6)))
+    
+    def status(self) -> str:
+        """Short rate summary for the console"""
+        target = f"{self.target_fps:g}" if self.target_fps else "max"
+        return f"{self.current_fps():.1f}/{target} inf/s"
+
+
 class WebPolygonDrawer:
     """Interactive polygon drawing for web interface"""
     
@@ -42,6 +159,10 @@ class WebPolygonDrawer:
             (0, 255, 0), (255, 0, 0), (0, 0, 255), (255, 255, 0),
             (255, 0, 255), (0, 255, 255), (128, 0, 128), (255, 165, 0)
         ]
+        # What-if counts from cached detections of this video, if any
+        self.stored_detections = None
+        self._preview_key = None
+        self._preview = []
         
     def mouse_callback(self, event, x, y, flags, param):
         """Handle mouse events for polygon drawing"""
@@ -68,9 +189,22 @@ class WebPolygonDrawer:
                 print(f"🗑️ Deleted last queue")
                 self.save_polygons()
     
+    def preview_counts(self):
+        """Mean/max people per zone over the cached video for the zones drawn so far"""
+        zones = [list(p) for p in self.polygons]
+        if len(self.current_polygon) >= 3:
+            zones.append(list(self.current_polygon))
+        key = json.dumps(zones)
+        if key != self._preview_key:
+            # Only recount when a zone changes, not on every redraw
+            self._preview = self.stored_detections.preview(zones) if zones else []
+            self._preview_key = key
+        return self._preview
+    
     def draw_interface(self, frame):
         """Draw polygons and UI"""
         overlay = frame.copy()
+        preview = self.preview_counts() if self.stored_detections is not None else []
         
         # Draw completed polygons
         for i, polygon in enumerate(self.polygons):
@@ -83,6 +217,9 @@ class WebPolygonDrawer:
                 center = np.mean(pts, axis=0).astype(int)
                 cv2.putText(frame, f"Q{i+1}", (center[0]-15, center[1]+8),
                           cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 3)
+                if i < len(preview):
+                    cv2.putText(frame, f"avg {preview[i]['mean']:.1f} | max {preview[i]['max']}",
+                              (center[0]-60, center[1]+40), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
         
         # Blend overlay
         cv2.addWeighted(overlay, 0.3, frame, 0.7, 0, frame)
@@ -96,12 +233,19 @@ class WebPolygonDrawer:
             
             if self.temp_point and len(self.current_polygon) > 0:
                 cv2.line(frame, self.current_polygon[-1], self.temp_point, (0, 255, 255), 2)
+            
+            if len(self.current_polygon) >= 3 and len(preview) > len(self.polygons):
+                center = np.mean(np.array(self.current_polygon), axis=0).astype(int)
+                cv2.putText(frame, f"what-if: avg {preview[-1]['mean']:.1f} | max {preview[-1]['max']}",
+                          (max(0, min(center[0]-90, frame.shape[1]-260)), center[1]),
+                          cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
         
         # Instructions
         instructions = [
             "LEFT CLICK: Add point",
             "RIGHT CLICK: Complete polygon",
             "MIDDLE CLICK: Delete last",
+            "First edge = head of the line",
             "S: Save & Continue | Q: Quit",
             f"Queues defined: {len(self.polygons)}"
         ]
@@ -132,18 +276,24 @@ class WebPolygonDrawer:
     
     def run(self):
         """Main drawing loop"""
-        cap = cv2.VideoCapture(self.video_path)
-        if not cap.isOpened():
+        source = open_frame_source(self.video_path, loop=False)
+        if not source.isOpened():
             print(f"❌ Cannot open video: {self.video_path}")
             return []
         
-        ret, self.frame = cap.read()
-        cap.release()
+        ret, self.frame = source.read()
+        source.release()
         
         if not ret:
             print("❌ Cannot read video frame")
             return []
         
+        try:
+            self.stored_detections = StoredDetections(self.video_path)
+            print(f"🔮 What-if preview from {len(self.stored_detections.frames)} cached frames")
+        except (FileNotFoundError, OSError, ValueError):
+            self.stored_detections = None
+        
         cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
         cv2.resizeWindow(self.window_name, 1280, 720)
         cv2.setMouseCallback(self.window_name, self.mouse_callback)
@@ -153,6 +303,7 @@ class WebPolygonDrawer:
         print("📍 LEFT CLICK: Add point")
         print("✅ RIGHT CLICK: Complete polygon")
         print("🗑️ MIDDLE CLICK: Delete last")
+        print("🚪 Start each zone at the head of the line: first two points = the front edge")
         print("💾 S: Save & Continue")
         print("❌ Q: Quit")
         print("=" * 50)
@@ -181,27 +332,103 @@ class WebPolygonDrawer:
 class WebQueueDetector:
     """Queue detection for web interface"""
     
-    def __init__(self, video_path: str, polygons: List):
+    def __init__(self, video_path: str, polygons: List, queue_size: int = 2,
+                 drop_policy: str = 'block', batch_size: int = 1,
+                 batch_timeout: float = 0.05, zone_mask_scale: int = 1,
+                 target_fps: Optional[float] = None, motion_threshold: float = 0.0,
+                 motion_max_interval: float = 5.0, roi_crop: bool = False,
+                 roi_margin: float = 0.15, tile_size: int = 0,
+                 tile_overlap: float = 0.2, backend: str = 'torch', imgsz: int = 640,
+                 track: bool = False, detect_interval: int = 1, smooth_window: int = 5,
+                 smooth_filter: str = 'mean', best_queue_hysteresis: float = 0.0,
+                 backend_threads: Optional[int] = None, pace: str = 'max', pace_speed: float = 1.0,
+                 detection_cache: bool = False, cache_size_mb: float = 256, publish_fps: float = 2.0):
         self.video_path = video_path
         self.polygons = polygons
-        self.model = None
+        self.backend = None
         self.is_running = False
+        # Set by stop(); a stop that arrives before run() gets going still sticks
+        self.stop_requested = threading.Event()
+        # Pipeline: decode thread -> inference (main thread) -> publish thread.
+        # 'drop_oldest' keeps the newest frame under load, 'block' keeps every frame.
+        self.queue_size = queue_size
+        self.drop_policy = drop_policy
+        self.latest_display_frame = None
+        # Live runs stamp frames with wall-clock time, offline analysis with video time
+        self.use_media_time = False
+        # Batch mode: gather up to batch_size frames (or wait batch_timeout
+        # seconds after the first one) and run them through the model at once
+        self.batch_size = max(1, batch_size)
+        self.batch_timeout = batch_timeout
+        # Frame skipping adapts to measured inference latency
+        self.scheduler = FrameScheduler(target_fps)
+        # Optional motion gate: reuse the last counts while the zones are static
+        self.motion_gate = MotionGate(motion_threshold, max_interval=motion_max_interval) \
+            if motion_threshold > 0 else None
+        self.last_output = None
+        self.gated_frames = 0
         self.data_dir = Path(__file__).parent.parent / 'data'
         self.data_dir.mkdir(exist_ok=True)
         # Smoothing window for queue counts to reduce noise
-        self.count_history = deque(maxlen=5)
+        self.smoother = CountSmoother(len(polygons), window=smooth_window, method=smooth_filter)
+        # Keep the current best queue unless another beats it by more than this
+        self.best_queue_hysteresis = best_queue_hysteresis
+        # Playback pacing for file sources in live runs (analysis always runs at max speed)
+        self.pace = pace
+        self.pace_speed = pace_speed
+        # Boxes of already-seen video frames, reused instead of re-running the model
+        self.use_detection_cache = detection_cache
+        self.cache_size_mb = cache_size_mb
+        self.detection_cache = None
+        # Snapshots written per second; the dashboard refreshes at most once a second
+        self.publish_fps = publish_fps
+        self._last_payload = None
+        self._last_frame_id = None
+        self.heartbeat_interval = 1.0
+        self._last_heartbeat = 0.0
+        # Sequence number of the last queues.json written (continues from the file on disk)
+        self._seq = None
+        # Inference threads per backend (None = library default)
+        self.backend_threads = backend_threads
+        self._best_queue = None
         # Minimum relative box area to filter tiny false positives
         self.min_box_area_ratio = 0.003  # 0.3% of frame area
+        # Precompiled polygon label raster, built on the first frame and
+        # rebuilt whenever the frame size or polygons change
+        self.zone_mask = ZoneMask(scale=zone_mask_scale)
+        # Optionally crop inference input to the zones' bounding rectangle
+        # (margin is a fraction of the frame size on every side)
+        self.roi_crop = roi_crop
+        self.roi_margin = roi_margin
+        # Tiled inference for high-resolution cameras (0 = off)
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.tile_nms_iou = 0.5
+        # Lower confidence threshold for more sensitive detection
+        self.conf_threshold = 0.15
+        self.iou_threshold = 0.5
+        self.tiles_per_frame = 1.0
+        # Inference runtime: 'torch', 'onnx' or 'openvino' (see inference_backends.py)
+        self.backend_name = backend
+        self.imgsz = imgsz
+        # Optional tracking: YOLO runs every detect_interval-th processed frame
+        # and tracked boxes are propagated in between
+        self.tracker = PersonTracker() if track else None
+        self.detect_interval = max(1, detect_interval)
+        self.frames_since_detection = 0
+        # Per-queue dwell times need persistent identities, so only with tracking
+        self.dwell_stats = QueueDwellStats(len(polygons), polygons=polygons) if track else None
+        # Measured service rate per queue drives the expected-wait ranking
+        self.service_rates = ServiceRateEstimator(len(polygons))
         
     def load_model(self):
         """Load YOLO model"""
         try:
-            model_path = str(queue_guidance_path / 'yolov8s.pt')
-            if not os.path.exists(model_path):
-                model_path = str(queue_guidance_path / 'yolov8m.pt')
-            
-            print(f"🤖 Loading model: {model_path}")
-            self.model = YOLO(model_path)
+            model_path = default_model_path()
+            print(f"🤖 Loading model: {model_path} ({self.backend_name} backend)")
+            # INT8 static quantization calibrates on frames of this video
+            self.backend = create_backend(self.backend_name, model_path, threads=self.backend_threads,
+                                          calibration_video=self.video_path)
             print("✅ Model loaded")
             return True
         except Exception as e:
@@ -228,39 +455,115 @@ class WebQueueDetector:
         
         return inside
     
+    def _inference_rect(self, frame):
+        """Region of the frame the model should see: zone ROI or the whole frame"""
+        if self.roi_crop:
+            return zones_bounding_rect(self.polygons, frame.shape, self.roi_margin)
+        return (0, 0) + frame.shape[1::-1]
+    
+    def predict_boxes(self, frames):
+        """Run the model and return an (N, 5) [x1, y1, x2, y2, conf] array per frame"""
+        # Each model input is a crop of one frame plus where it sits in that frame
+        inputs, crops, owners, frame_rects = [], [], [], []
+        for index, frame in enumerate(frames):
+            rect = self._inference_rect(frame)
+            frame_rects.append(rect)
+            rects = tile_grid(rect, self.tile_size, self.tile_overlap) if self.tile_size else [rect]
+            for x0, y0, x1, y1 in rects:
+                inputs.append(frame[y0:y1, x0:x1])
+                crops.append((x0, y0, x1, y1))
+                owners.append(index)
+        self.tiles_per_frame = len(inputs) / max(1, len(frames))
+        
+        results = self.backend.predict(inputs, conf=self.conf_threshold, iou=self.iou_threshold,
+                                       imgsz=self.tile_size or self.imgsz)
+        
+        per_frame = [[] for _ in frames]
+        for boxes, crop, index in zip(results, crops, owners):
+            # Map crop coordinates back to the full frame
+            boxes[:, [0, 2]] += crop[0]
+            boxes[:, [1, 3]] += crop[1]
+            per_frame[index].append((boxes, crop))
+        
+        if not self.tile_size:
+            return [parts[0][0] for parts in per_frame]
+        # People straddling tile borders are detected more than once, often as partial boxes
+        return [merge_tile_boxes(parts, rect, self.tile_nms_iou)
+                for parts, rect in zip(per_frame, frame_rects)]
+    
+    def detector_settings(self):
+        """Everything that changes the boxes predict_boxes returns for a frame"""
+        model_path = default_model_path()
+        weights = os.stat(model_path) if os.path.exists(model_path) else None
+        return {
+            'model': Path(model_path).name,
+            'weights': [weights.st_size, int(weights.st_mtime)] if weights else None,
+            'backend': self.backend_name,
+            'conf': self.conf_threshold,
+            'iou': self.iou_threshold,
+            'imgsz': self.imgsz,
+            'roi': [self.roi_margin, self.polygons] if self.roi_crop else None,
+            'tiles': [self.tile_size, self.tile_overlap, self.tile_nms_iou, 'clipped'] if self.tile_size else None,
+        }
+    
+    def predict_boxes_cached(self, frames, positions):
+        """predict_boxes, reusing cached boxes for frames already seen at these file positions"""
+        if self.detection_cache is None:
+            return self.predict_boxes(frames)
+        boxes = [self.detection_cache.get(position) for position in positions]
+        missing = [i for i, cached in enumerate(boxes) if cached is None]
+        if missing:
+            for i, predicted in zip(missing, self.predict_boxes([frames[i] for i in missing])):
+                self.detection_cache.put(positions[i], predicted)
+                boxes[i] = predicted
+        return boxes
+    
+    def _open_detection_cache(self, source):
+        """Detection cache for file sources when enabled (frame positions of streams aren't stable)"""
+        if not self.use_detection_cache or not isinstance(source, VideoFileSource):
+            return None
+        cache = DetectionCache(self.data_dir / 'detection_cache', self.video_path, self.detector_settings(),
+                               max_bytes=int(self.cache_size_mb * 1024 * 1024))
+        print(f"🗃️ Detection cache: {cache.status()}")
+        return cache
+    
     def detect_and_count(self, frame):
         """Detect people and count per queue"""
-        # Lower confidence threshold for more sensitive detection
-        results = self.model(frame, conf=0.15, iou=0.5, classes=[0], verbose=False)[0]
-        
-        queue_counts = [0] * len(self.polygons)
-        all_detections = []
+        return self.count_detections(frame, self.predict_boxes([frame])[0])
+    
+    def count_detections(self, frame, boxes, track_ids=None):
+        """Count people per queue from one frame's (N, 5) box array"""
         h, w = frame.shape[:2]
         min_area = self.min_box_area_ratio * (w * h)
         
-        for box in results.boxes:
-            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-            conf = float(box.conf[0])
-            # Filter out extremely small boxes (often false positives)
-            box_area = max(0.0, float((x2 - x1) * (y2 - y1)))
-            if box_area < min_area:
-                continue
-            
-            # Use bottom center as person position
-            center_x = int((x1 + x2) / 2)
-            center_y = int(y2)
-            
-            # Check which queue this person is in
-            for i, polygon in enumerate(self.polygons):
-                if self.point_in_polygon((center_x, center_y), polygon):
-                    queue_counts[i] += 1
-                    break
-            
-            all_detections.append({
-                'bbox': [float(x1), float(y1), float(x2), float(y2)],
-                'conf': conf,
-                'center': [center_x, center_y]
-            })
+        xyxy, confs = boxes[:, :4], boxes[:, 4]
+        x1, y1, x2, y2 = xyxy.T
+        
+        # Filter out extremely small boxes (often false positives)
+        box_areas = np.maximum(0.0, (x2 - x1) * (y2 - y1)).astype(np.float64)
+        keep = box_areas >= min_area
+        xyxy, confs = xyxy[keep], confs[keep]
+        if track_ids is not None:
+            track_ids = track_ids[keep]
+        x1, y1, x2, y2 = xyxy.T
+        
+        # Use bottom center as person position
+        centers = np.stack([((x1 + x2) / 2).astype(np.int64), y2.astype(np.int64)], axis=1)
+        
+        # Check which queue each person is in
+        labels = self.zone_mask.assign(centers, frame.shape, self.polygons)
+        queue_counts = np.bincount(labels[labels >= 0], minlength=len(self.polygons)).tolist()
+        
+        all_detections = [
+            {'bbox': bbox, 'conf': conf, 'center': center}
+            for bbox, conf, center in zip(xyxy.astype(np.float64).tolist(),
+                                          confs.astype(np.float64).tolist(),
+                                          centers.tolist())
+        ]
+        if track_ids is not None:
+            for det, track_id, label in zip(all_detections, track_ids.tolist(), labels.tolist()):
+                det['track_id'] = track_id
+                det['queue'] = label
         
         return queue_counts, all_detections
     
@@ -291,21 +594,42 @@ class WebQueueDetector:
             x1, y1, x2, y2 = [int(v) for v in det['bbox']]
             cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
             cv2.circle(frame, tuple(det['center']), 5, (0, 0, 255), -1)
+            if 'track_id' in det:
+                cv2.putText(frame, f"#{det['track_id']}", (x1, max(0, y1 - 6)),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
         
         return frame
     
-    def save_frame_and_data(self, frame, queue_counts):
+    def rank_queues(self, queue_counts, expected_waits=None):
+        """1-based best and worst queue, by expected wait when available"""
+        if sum(queue_counts) == 0:
+            return 1, 1
+        keys = expected_waits if expected_waits else queue_counts
+        best = keys.index(min(keys))
+        # Hysteresis: don't flip the recommendation over marginal differences
+        previous = self._best_queue
+        if self.best_queue_hysteresis > 0 and previous is not None and previous < len(keys) and \
+                keys[previous] - keys[best] <= self.best_queue_hysteresis:
+            best = previous
+        self._best_queue = best
+        return best + 1, keys.index(max(keys)) + 1
+    
+    def _next_seq(self):
+        """Monotonic snapshot sequence number, continuing across detector restarts"""
+        if self._seq is None:
+            try:
+                with open(self.data_dir / 'queues.json') as f:
+                    self._seq = int(json.load(f).get('seq', 0))
+            except (OSError, ValueError, TypeError, AttributeError):
+                self._seq = 0
+        self._seq += 1
+        return self._seq
+    
+    def save_frame_and_data(self, frame, queue_counts, extra=None, frame_id=None, detections=None):
         """Save current frame and data"""
-        # Save frame
-        cv2.imwrite(str(self.data_dir / 'live_frame.jpg'), frame)
-        
         # Calculate recommendations
-        if sum(queue_counts) > 0:
-            best_queue = queue_counts.index(min(queue_counts)) + 1
-            worst_queue = queue_counts.index(max(queue_counts)) + 1
-        else:
-            best_queue = 1
-            worst_queue = 1
+        expected_waits = (extra or {}).get('expected_wait_minutes')
+        best_queue, worst_queue = self.rank_queues(queue_counts, expected_waits)
         
         # Save data
         data = {
@@ -317,69 +641,337 @@ class WebQueueDetector:
             'worst_queue': worst_queue,
             'recommendation': f"Queue {best_queue} is fastest with {queue_counts[best_queue-1]} people"
         }
+        if expected_waits:
+            data['recommendation'] += f" (~{expected_waits[best_queue-1]:.0f} min wait)"
+        # Optional extras (e.g. dwell_times) ride along without changing the base schema
+        if extra:
+            data.update(extra)
+        
+        json_path = self.data_dir / 'queues.json'
+        # The JPEG shows the boxes, so they are part of "unchanged"; source_health
+        # changes on every frame and is refreshed by the heartbeat instead
+        payload = ({key: value for key, value in data.items() if key not in ('timestamp', 'source_health')},
+                   [det['bbox'] for det in detections or []])
+        if payload == self._last_payload and json_path.exists():
+            if time.time() - self._last_heartbeat < self.heartbeat_interval:
+                # Nothing changed (e.g. motion-gated reuse): skip both writes
+                return
+            # Heartbeat: new seq/timestamp for the snapshot already on disk, so frame_id
+            # still names the JPEG there
+            frame_id = self._last_frame_id
+        else:
+            # Save frame (temp file + rename, so the dashboard never reads half an image).
+            # The JSON written below always describes the JPEG on disk.
+            ok, jpeg = cv2.imencode('.jpg', frame)
+            if not ok:
+                return
+            write_atomic(self.data_dir / 'live_frame.jpg', jpeg.tobytes())
+            self._last_payload = payload
+        
+        # seq tells readers a new snapshot (and frame) arrived without comparing contents
+        data['seq'] = self._next_seq()
+        data['frame_id'] = frame_id
+        write_atomic(json_path, json.dumps(data, indent=2).encode())
+        self._last_frame_id = frame_id
+        self._last_heartbeat = time.time()
+    
+    def _decode_loop(self, source, frame_queue, initial_skip=None):
+        """Decode stage: skip frames per the scheduler and hand the rest to inference"""
+        frame_count = 0
+        while self.is_running and source.isOpened():
+            self.scheduler.wait_for_slot()
+            
+            # Skipped frames are only grabbed, never decoded
+            stride = self.scheduler.stride(source.fps)
+            skip = stride - 1 if initial_skip is None else initial_skip
+            initial_skip = None
+            frame_count += source.skip(skip)
+            if not source.grab():
+                continue
+            frame = source.retrieve()
+            if frame is None:
+                continue
+            
+            frame_count += 1
+            timestamp = source.timestamp() if self.use_media_time else time.time()
+            # The file position keys the detection cache
+            frame_queue.put((frame_count, frame, timestamp, source.position), lambda: self.is_running)
+    
+    def _publish_snapshot(self, item):
+        """Publish stage: annotate the newest frame and write it out for the dashboard"""
+        frame_id, frame, smoothed, detections, extra = item
+        display_frame = self.draw_detections(frame, smoothed, detections)
+        
+        # Save data
+        self.save_frame_and_data(display_frame, smoothed, extra, frame_id, detections)
+        self.latest_display_frame = display_frame
+    
+    def _gather_batch(self, frame_queue):
+        """Collect up to batch_size frames, waiting at most batch_timeout after the first"""
+        first = frame_queue.get()
+        if first is None:
+            return []
+        
+        batch = [first]
+        deadline = time.time() + self.batch_timeout
+        while len(batch) < self.batch_size and self.is_running:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            item = frame_queue.get(timeout=remaining)
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+    
+    def _tiling_status(self):
+        """Frame-level cost of tiled inference for the status line"""
+        if not self.tile_size or self.scheduler.latency is None:
+            return ""
+        return f" | 🧩 {self.tiles_per_frame:.0f} tiles/frame, {self.scheduler.latency * 1000:.0f} ms/frame"
+    
+    def _plan_frame(self, frame, timestamp: Optional[float] = None) -> str:
+        """How to handle a frame: 'detect', 'propagate' (tracker only) or 'reuse'"""
+        if self.tracker is not None and self.last_output is not None and \
+                self.frames_since_detection < self.detect_interval - 1:
+            self.frames_since_detection += 1
+            return 'propagate'
+        if self.motion_gate is not None and self.last_output is not None and \
+                not self.motion_gate.should_infer(frame, self.polygons, timestamp):
+            return 'reuse'
+        self.frames_since_detection = 0
+        return 'detect'
+    
+    def _infer_batch(self, frames, timestamps, positions=None):
+        """Counts and detections per frame; detection runs batched, the rest is cheap"""
+        positions = positions if positions is not None else [None] * len(frames)
+        plans = [self._plan_frame(frame, timestamp) for frame, timestamp in zip(frames, timestamps)]
+        needed = [i for i, plan in enumerate(plans) if plan == 'detect']
+        
+        detected = {}
+        if needed:
+            started = time.time()
+            detected = dict(zip(needed, self.predict_boxes_cached([frames[i] for i in needed],
+                                                                   [positions[i] for i in needed])))
+            if self.tracker is None:
+                # Without tracking, counting is part of the measured inference cost
+                detected = {i: self.count_detections(frames[i], boxes) for i, boxes in detected.items()}
+            self.scheduler.record_inference(time.time() - started, len(needed))
+        
+        outputs = []
+        for i, plan in enumerate(plans):
+            if plan == 'reuse':
+                self.gated_frames += 1
+            elif self.tracker is None:
+                self.last_output = detected[i]
+            else:
+                # Zone counts come from tracked identities, not raw detections
+                if plan == 'detect':
+                    self.tracker.update(detected[i], timestamps[i])
+                else:
+                    self.tracker.predict(timestamps[i])
+                boxes, ids = self.tracker.active()
+                self.last_output = self.count_detections(frames[i], boxes, ids)
+            outputs.append(self.last_output)
+        return outputs
+    
+    def smooth_counts(self, queue_counts):
+        """Smooth counts over last N frames to reduce jitter"""
+        return self.smoother.update(queue_counts)
+    
+    def _update_queue_state(self, queue_counts, detections, timestamp):
+        """Smoothing, dwell and wait-time bookkeeping for one processed frame"""
+        smoothed = self.smooth_counts(queue_counts)
+        extra = {}
+        if self.dwell_stats is not None:
+            exits = self.dwell_stats.update(detections, timestamp)
+            self.service_rates.add_exits(exits, timestamp)
+            extra['dwell_times'] = self.dwell_stats.summary(timestamp)
+        extra['service_rate_per_min'] = [round(r, 2) for r in self.service_rates.rates(timestamp)]
+        extra['expected_wait_minutes'] = [
+            round(w, 1) for w in self.service_rates.expected_waits(smoothed, timestamp)
+        ]
+        return smoothed, extra
+    
+    def _process_source(self, source, handle_result, show_window=False, initial_skip=None):
+        """Drive decode -> inference over a source, handing each frame's result to handle_result.
+        
+        initial_skip replaces the scheduler's skip before the first frame (grid alignment).
+        """
+        drop_oldest = self.drop_policy == 'drop_oldest'
+        # The frame queue must be able to hold a full batch
+        frame_queue = FrameQueue(max(self.queue_size, self.batch_size), drop_oldest=drop_oldest)
+        self.detection_cache = self._open_detection_cache(source)
+        decode_thread = threading.Thread(target=self._decode_loop, args=(source, frame_queue, initial_skip),
+                                         daemon=True)
+        decode_thread.start()
         
-        with open(self.data_dir / 'queues.json', 'w') as f:
-            json.dump(data, f, indent=2)
+        try:
+            while self.is_running:
+                batch = self._gather_batch(frame_queue)
+                if not batch:
+                    if not decode_thread.is_alive():
+                        break
+                    continue
+                
+                outputs = self._infer_batch([item[1] for item in batch], [item[2] for item in batch],
+                                            [item[3] for item in batch])
+                
+                for (frame_id, frame, timestamp, _), (queue_counts, detections) in zip(batch, outputs):
+                    smoothed, extra = self._update_queue_state(queue_counts, detections, timestamp)
+                    handle_result(frame_id, frame, timestamp, queue_counts, smoothed, detections, extra)
+                
+                if show_window and self.latest_display_frame is not None:
+                    cv2.imshow('Queue Detection', self.latest_display_frame)
+                
+                if show_window and cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+        finally:
+            self.is_running = False
+            decode_thread.join(timeout=2.0)
+            if self.detection_cache is not None:
+                self.detection_cache.flush()
+                print(f"🗃️ Detection cache: {self.detection_cache.status()}")
+        return frame_queue
+    
+    def stop(self):
+        """Ask a running (or about to run) detection loop to finish"""
+        self.stop_requested.set()
+        self.is_running = False
     
     def run(self, show_window=True):
         """Run detection loop"""
-        if not self.load_model():
+        # A model server may hand us an already loaded backend
+        if self.backend is None and not self.load_model():
             return
         
-        cap = cv2.VideoCapture(self.video_path)
-        if not cap.isOpened():
+        source = open_frame_source(self.video_path, pacer=PlaybackPacer(self.pace, self.pace_speed))
+        if not source.isOpened():
             print(f"❌ Cannot open video")
             return
         
         self.is_running = True
+        # Re-check after setting the flag, so a concurrent stop() can't be overwritten
+        if self.stop_requested.is_set():
+            self.is_running = False
+            source.release()
+            return
         print(f"\n🎯 Detection Started - {len(self.polygons)} queues")
         
         if show_window:
             cv2.namedWindow('Queue Detection', cv2.WINDOW_NORMAL)
             cv2.resizeWindow('Queue Detection', 1280, 720)
         
-        frame_count = 0
-        while self.is_running and cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                continue
-            
-            frame_count += 1
-            
-            # Detect every 2 frames for performance
-            if frame_count % 2 == 0:
-                queue_counts, detections = self.detect_and_count(frame)
-                # Smooth counts over last N frames to reduce jitter
-                self.count_history.append(queue_counts)
-                if len(self.count_history) > 1:
-                    # Average per-queue counts across the window
-                    smoothed = [
-                        int(round(sum(history[i] for history in self.count_history) / len(self.count_history)))
-                        for i in range(len(queue_counts))
-                    ]
-                else:
-                    smoothed = queue_counts
-
-                display_frame = self.draw_detections(frame.copy(), smoothed, detections)
-                
-                # Save data
-                self.save_frame_and_data(display_frame, smoothed)
-                
-                if show_window:
-                    cv2.imshow('Queue Detection', display_frame)
-                
-                print(f"📊 Queues: {queue_counts} | Total: {sum(queue_counts)}")
-            
-            if show_window and cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+        # Only the newest result is drawn and written, at publish_fps, off the inference thread
+        publisher = CoalescingPublisher(self._publish_snapshot, rate=self.publish_fps)
+        publisher.start()
+        
+        def publish(frame_id, frame, timestamp, queue_counts, smoothed, detections, extra):
+            if hasattr(source, 'health'):
+                extra['source_health'] = source.health()
+            publisher.submit((frame_id, frame, smoothed, detections, extra))
+            print(f"📊 Queues: {queue_counts} | Total: {sum(queue_counts)} | "
+                  f"⚡ {self.scheduler.status()}{self._tiling_status()}")
         
-        cap.release()
+        try:
+            frame_queue = self._process_source(source, publish, show_window)
+        finally:
+            self.is_running = False
+            publisher.stop()
+        
+        source.release()
         if show_window:
             cv2.destroyAllWindows()
         
-        self.is_running = False
+        if self.gated_frames:
+            print(f"💤 Reused previous counts on {self.gated_frames} static frames")
+        if frame_queue.dropped:
+            print(f"⏭️ Dropped {frame_queue.dropped} stale frames")
+        print(f"📤 Published {publisher.published} snapshots ({publisher.coalesced} results superseded before publishing)")
+        if source.dropped and hasattr(source, 'health'):
+            print(f"⏭️ Skipped {source.dropped} camera frames that arrived while inference was busy")
+        elif source.dropped:
+            print(f"⏭️ Pacing dropped {source.dropped} late frames ({self.pace} playback)")
         print("✅ Detection stopped")
+    
+    def analyze_segment(self, start: int = 0, end: Optional[int] = None, stride: int = 2,
+                        warmup_start: Optional[int] = None, on_progress=None):
+        """Analyse frames [start, end) of the video and return the recorded time series.
+        
+        Frames are sampled on the same global grid as a single pass from frame 0.
+        Decoding begins at warmup_start (<= start, ideally a keyframe); frames before
+        start only settle tracker and motion state and are not recorded.
+        """
+        if self.backend is None and not self.load_model():
+            return None
+        
+        first = start if warmup_start is None else min(warmup_start, start)
+        source = open_frame_source(self.video_path, loop=False, start=first, end=end)
+        if not source.isOpened():
+            print(f"❌ Cannot open video")
+            return None
+        
+        # Line up with the frames a pass from frame 0 would sample (index % stride == stride - 1)
+        base = source.position + 1
+        initial_skip = (stride - 1 - base) % stride
+        recorder = TimeSeriesRecorder(len(self.polygons))
+        
+        # Every stride-th frame, no real-time pacing, timestamps from the video itself
+        self.scheduler = FrameScheduler(initial_stride=stride, adaptive=False)
+        self.use_media_time = True
+        self.drop_policy = 'block'
+        self.is_running = True
+        
+        def record(frame_id, frame, timestamp, queue_counts, smoothed, detections, extra):
+            index = base + frame_id - 1
+            if index >= start:
+                recorder.add(index, timestamp, queue_counts, smoothed, extra.get('expected_wait_minutes'))
+            if on_progress:
+                on_progress(index)
+        
+        try:
+            self._process_source(source, record, initial_skip=initial_skip)
+        finally:
+            source.release()
+        return recorder.arrays()
+    
+    def analyze(self, output_path=None, stride: int = 2):
+        """Process the video once, as fast as possible, and save a time series of zone counts"""
+        if self.backend is None and not self.load_model():
+            return None
+        
+        output_path = Path(output_path) if output_path else analysis_output_path(self.data_dir, self.video_path)
+        # Image sequences are walked lazily, so their length is unknown (no percentage/ETA)
+        probe = open_frame_source(self.video_path, loop=False)
+        total_frames = max(0, probe.frame_count)
+        probe.release()
+        progress = ProgressReporter(self.data_dir / 'analysis_progress.json', self.video_path, total_frames)
+        print(f"\n📈 Analysis Started - {len(self.polygons)} queues, 1 of every {stride} frames")
+        
+        def report(index):
+            status = progress.update(index + 1)
+            if status['progress'] is not None and (index + 1) % (50 * stride) < stride:
+                print(f"⏳ {status['progress']:.0%} | {status['fps']} frames/s | ETA {status['eta_seconds']}s")
+        
+        try:
+            series = self.analyze_segment(stride=stride, on_progress=report)
+        except Exception as e:
+            progress.fail(str(e))
+            raise
+        if series is None:
+            progress.fail('Cannot open video')
+            return None
+        
+        summary = summarize(series, time.time() - progress.started)
+        save_timeseries(output_path, series, {
+            'video_path': self.video_path,
+            'polygons': self.polygons,
+            'stride': stride,
+            'summary': summary,
+        })
+        progress.finish(str(output_path), summary)
+        print_summary(summary, output_path)
+        return summary
 
 
 def main():
@@ -388,10 +980,66 @@ def main():
     
     parser = argparse.ArgumentParser(description='QueueGuidance Web Backend')
     parser.add_argument('--video', type=str, required=True, help='Path to video file')
-    parser.add_argument('--mode', type=str, default='full', choices=['polygon', 'detect', 'full'],
-                       help='Mode: polygon=draw only, detect=detect only, full=both')
+    parser.add_argument('--mode', type=str, default='full', choices=['polygon', 'detect', 'full', 'analyze'],
+                       help='Mode: polygon=draw only, detect=detect only, full=both, '
+                            'analyze=process the file once and save a time series')
     parser.add_argument('--headless', action='store_true', 
                        help='Run without displaying video window (detection only)')
+    parser.add_argument('--queue-size', type=int, default=2,
+                       help='Max frames buffered between pipeline stages')
+    parser.add_argument('--batch-size', type=int, default=1,
+                       help='Frames per batched inference (>1 favours throughput over latency)')
+    parser.add_argument('--batch-timeout', type=float, default=0.05,
+                       help='Max seconds to wait for a batch to fill')
+    parser.add_argument('--zone-mask-scale', type=int, default=1,
+                       help='Downscale factor of the queue zone label raster (1 = exact, higher saves memory)')
+    parser.add_argument('--target-fps', type=float, default=None,
+                       help='Target inferences per second (default: as fast as inference allows)')
+    parser.add_argument('--motion-threshold', type=float, default=0.0,
+                       help='Skip inference while less than this fraction of zone pixels changes (0 = off)')
+    parser.add_argument('--motion-max-interval', type=float, default=5.0,
+                       help='Force a full inference at least every N seconds when motion-gated')
+    parser.add_argument('--roi-crop', action='store_true',
+                       help='Run inference only on the bounding rectangle of the queue zones')
+    parser.add_argument('--roi-margin', type=float, default=0.15,
+                       help='Margin around the zones when cropping, as a fraction of frame size')
+    parser.add_argument('--tile-size', type=int, default=0,
+                       help='Split frames into tiles of this many pixels for inference (0 = off)')
+    parser.add_argument('--tile-overlap', type=float, default=0.2,
+                       help='Fractional overlap between neighbouring tiles')
+    parser.add_argument('--backend', type=str, default='torch', choices=list(BACKENDS),
+                       help='Inference runtime; onnx/openvino export the model on first use')
+    parser.add_argument('--imgsz', type=int, default=640,
+                       help='Model input size')
+    parser.add_argument('--track', action='store_true',
+                       help='Track people across frames and count tracked identities')
+    parser.add_argument('--detect-interval', type=int, default=1,
+                       help='With --track, run YOLO on every Nth processed frame only')
+    parser.add_argument('--smooth-window', type=int, default=5,
+                       help='Number of processed frames the count smoother looks back over')
+    parser.add_argument('--smooth-filter', type=str, default='mean', choices=list(FILTERS),
+                       help='Count smoothing filter')
+    parser.add_argument('--best-queue-hysteresis', type=float, default=0.0,
+                       help='Only switch best queue when another is better by more than this')
+    parser.add_argument('--analysis-stride', type=int, default=2,
+                       help='In analyze mode, process 1 of every N frames')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='In analyze mode, split the video into segments analysed by N processes')
+    parser.add_argument('--output', type=str, default=None,
+                       help='In analyze mode, time-series file (default: data/analysis_<video>.npz)')
+    parser.add_argument('--pace', type=str, default='max', choices=list(PACING_MODES),
+                       help='File playback pacing: max=as fast as possible, realtime=follow the video FPS, '
+                            'multiplier=--pace-speed times real time (late frames are dropped)')
+    parser.add_argument('--pace-speed', type=float, default=1.0,
+                       help='Playback speed for --pace multiplier, e.g. 4 for 4x')
+    parser.add_argument('--detection-cache', action='store_true',
+                       help='Cache boxes per video frame under data/detection_cache so loops and re-runs skip inference')
+    parser.add_argument('--cache-size-mb', type=float, default=256,
+                       help='Size limit of the detection cache directory (least recently used files are evicted)')
+    parser.add_argument('--publish-fps', type=float, default=2.0,
+                       help='Dashboard snapshots written per second (0 = after every processed frame)')
+    parser.add_argument('--drop-policy', type=str, default='block', choices=['block', 'drop_oldest'],
+                       help='When a stage falls behind: block=wait, drop_oldest=keep newest frame')
     
     args = parser.parse_args()
     
@@ -422,11 +1070,44 @@ def main():
             polygon_data = json.load(f)
             polygons = polygon_data['polygons']
     
-    if args.mode in ['detect', 'full']:
+    if args.mode in ['detect', 'full', 'analyze']:
         # Start detection
-        detector = WebQueueDetector(video_path, polygons)
-        # Don't show window if headless mode is enabled
-        detector.run(show_window=not args.headless)
+        options = dict(queue_size=args.queue_size,
+                       drop_policy=args.drop_policy,
+                       batch_size=args.batch_size,
+                       batch_timeout=args.batch_timeout,
+                       zone_mask_scale=args.zone_mask_scale,
+                       target_fps=args.target_fps,
+                       motion_threshold=args.motion_threshold,
+                       motion_max_interval=args.motion_max_interval,
+                       roi_crop=args.roi_crop,
+                       roi_margin=args.roi_margin,
+                       tile_size=args.tile_size,
+                       tile_overlap=args.tile_overlap,
+                       backend=args.backend,
+                       imgsz=args.imgsz,
+                       track=args.track,
+                       detect_interval=args.detect_interval,
+                       smooth_window=args.smooth_window,
+                       smooth_filter=args.smooth_filter,
+                       best_queue_hysteresis=args.best_queue_hysteresis,
+                       pace=args.pace,
+                       pace_speed=args.pace_speed,
+                       detection_cache=args.detection_cache,
+                       cache_size_mb=args.cache_size_mb,
+                       publish_fps=args.publish_fps)
+        if args.mode == 'analyze' and args.workers > 1:
+            from parallel_analysis import analyze_parallel
+            analyze_parallel(video_path, polygons, options, workers=args.workers,
+                             stride=args.analysis_stride, output_path=args.output)
+            return
+        
+        detector = WebQueueDetector(video_path, polygons, **options)
+        if args.mode == 'analyze':
+            detector.analyze(args.output, stride=args.analysis_stride)
+        else:
+            # Don't show window if headless mode is enabled
+            detector.run(show_window=not args.headless)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,553 @@
+#!/usr/bin/env python3
+"""
+Frame sources for QueueGuidance Web
+Sources separate grabbing a frame (cheap, no decode) from retrieving it
+(decode + BGR conversion), so skipped frames never pay for decoding
+"""
+
+import os
+import cv2
+import glob
+import time
+import threading
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+STREAM_PREFIXES = ('rtsp://', 'rtsps://', 'rtmp://', 'http://', 'https://', '/dev/video')
+
+
+PACING_MODES = ('max', 'realtime', 'multiplier')
+
+
+class PlaybackPacer:
+    """Paces file playback against the wall clock.
+    
+    max plays as fast as frames can be read; realtime follows the source FPS;
+    multiplier follows it at `speed` times real time. When the reader falls
+    behind the schedule, late frames are dropped rather than played slowly.
+    """
+    
+    def __init__(self, mode: str = 'max', speed: float = 1.0):
+        if mode not in PACING_MODES:
+            raise ValueError(f"Unknown pacing mode '{mode}', choose from {', '.join(PACING_MODES)}")
+        self.mode = mode
+        self.speed = 1.0 if mode == 'realtime' else speed
+        self._origin = None
+    
+    @property
+    def active(self) -> bool:
+        return self.mode != 'max' and self.speed > 0
+    
+    def reset(self):
+        self._origin = None
+    
+    def lateness(self, media_time: float) -> float:
+        """Seconds the frame at media_time is behind schedule (negative = early)"""
+        now = time.time()
+        if self._origin is None:
+            self._origin = now - media_time / self.speed
+        return now - (self._origin + media_time / self.speed)
+
+
+class VideoFileSource:
+    """Video file read through OpenCV, optionally looping at the end"""
+    
+    def __init__(self, path: str, loop: bool = True, start: int = 0, end: Optional[int] = None,
+                 pacer: Optional[PlaybackPacer] = None):
+        self.path = path
+        self.pacer = pacer or PlaybackPacer()
+        # A bounded segment [start, end) never loops
+        self.loop = loop and end is None
+        self.end = end
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        # Index within the file of the last grabbed frame
+        self.position = -1
+        self.loops = 0
+        self.exhausted = False
+        # Frames advanced since opening (across loops) and frames dropped by pacing
+        self.played = 0
+        self.dropped = 0
+        if start > 0:
+            self.seek(start)
+    
+    def seek(self, frame_index: int):
+        """Position the source so the next grab returns frame_index (cheapest at a keyframe)"""
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+        self.position = frame_index - 1
+        self.played = 0
+        self.pacer.reset()
+    
+    def isOpened(self) -> bool:
+        return self.cap.isOpened() and not self.exhausted
+    
+    def _rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self.position = -1
+        self.loops += 1
+    
+    def _advance(self) -> bool:
+        """Advance one frame without decoding it or pacing"""
+        if self.exhausted or (self.end is not None and self.position + 1 >= self.end):
+            self.exhausted = True
+            return False
+        if self.cap.grab():
+            self.position += 1
+            self.played += 1
+            return True
+        if self.loop and self.position >= 0:
+            self._rewind()
+            if self.cap.grab():
+                self.position += 1
+                self.played += 1
+                return True
+        self.exhausted = True
+        return False
+    
+    def grab(self) -> bool:
+        """Advance one frame without decoding it, waiting or dropping frames per the pacer"""
+        if not self._advance():
+            return False
+        if not self.pacer.active:
+            return True
+        late = self.pacer.lateness((self.played - 1) / self.fps)
+        if late > 0:
+            # Behind schedule: jump to the frame that is due now
+            self.dropped += self.skip(int(late * self.fps * self.pacer.speed))
+            # Running off the end leaves nothing to retrieve
+            return not self.exhausted
+        time.sleep(-late)
+        return True
+    
+    def skip(self, count: int) -> int:
+        """Grab (but don't decode) up to count frames; returns how many were skipped"""
+        skipped = 0
+        while skipped < count and self._advance():
+            skipped += 1
+        return skipped
+    
+    def retrieve(self) -> Optional[np.ndarray]:
+        """Decode the last grabbed frame"""
+        ret, frame = self.cap.retrieve()
+        return frame if ret else None
+    
+    def read(self):
+        """Grab and decode the next frame, like cv2.VideoCapture.read"""
+        if not self.grab():
+            return False, None
+        frame = self.retrieve()
+        return frame is not None, frame
+    
+    def timestamp(self) -> float:
+        """Media time of the last grabbed frame in seconds"""
+        msec = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+        if msec > 0 or self.position <= 0:
+            return msec / 1000.0
+        # Some containers report no timestamps
+        return self.position / self.fps
+    
+    def release(self):
+        self.cap.release()
+
+
+def is_image_sequence(spec: str) -> bool:
+    """A directory or a glob pattern of images"""
+    return os.path.isdir(spec) or glob.has_magic(spec)
+
+
+def _sorted_entries(directory: str):
+    """Entries of one directory sorted by name (memory bounded by that directory)"""
+    with os.scandir(directory) as entries:
+        return sorted(entries, key=lambda entry: entry.name)
+
+
+def _walk_sorted(directory: str) -> Iterator[str]:
+    # Depth-first in name order, so f0001.jpg, f0002/..., f0003.jpg come out by name
+    for entry in _sorted_entries(directory):
+        if entry.is_dir(follow_symlinks=False):
+            yield from _walk_sorted(entry.path)
+        else:
+            yield entry.path
+
+
+def _glob_sorted(directory: str, parts: List[str]) -> Iterator[str]:
+    """Expand glob components one directory level at a time, each level in sorted order"""
+    head, tail = parts[0], parts[1:]
+    if head == '**':
+        # Zero or more directories: this level first, then each subdirectory by name
+        if tail:
+            yield from _glob_sorted(directory, tail)
+        for entry in _sorted_entries(directory or '.'):
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if not tail:
+                    yield entry.path
+                yield from _glob_sorted(entry.path, parts)
+            elif not tail:
+                yield entry.path
+        return
+    for path in sorted(glob.glob(os.path.join(glob.escape(directory), head))):
+        if not tail:
+            yield path
+        elif os.path.isdir(path):
+            yield from _glob_sorted(path, tail)
+
+
+def iter_image_paths(spec: str) -> Iterator[str]:
+    """Lazily yield image paths from a directory tree or glob, without listing everything first.
+    
+    Names are sorted within each directory (so zero-padded frame names play in
+    order); only one directory is listed at a time.
+    """
+    if os.path.isdir(spec):
+        paths = _walk_sorted(spec)
+    else:
+        # Split off the literal prefix, then expand the rest level by level
+        parts = spec.replace('\\', '/').split('/')
+        literal = 0
+        while literal < len(parts) - 1 and not glob.has_magic(parts[literal]):
+            literal += 1
+        root = '/'.join(parts[:literal]) or ('/' if spec.startswith('/') else '')
+        paths = _glob_sorted(root, parts[literal:])
+    for path in paths:
+        if path.lower().endswith(IMAGE_EXTENSIONS):
+            yield path
+
+
+def _decode_image(path: str) -> Optional[np.ndarray]:
+    # Reading bytes and imdecode both release the GIL, so pool threads decode in parallel
+    try:
+        data = np.fromfile(path, dtype=np.uint8)
+    except OSError:
+        return None
+    return cv2.imdecode(data, cv2.IMREAD_COLOR) if data.size else None
+
+
+class ImageSequenceSource:
+    """Images from a directory or glob, decoded by a thread pool with an ordered prefetch window"""
+    
+    def __init__(self, spec: str, loop: bool = True, fps: float = 30.0, workers: int = 4,
+                 prefetch: int = 16):
+        self.spec = spec
+        self.loop = loop
+        # Images carry no timing; fps sets the nominal spacing for timestamps and scheduling
+        self.fps = fps
+        self.frame_count = 0
+        self.position = -1
+        self.loops = 0
+        self.exhausted = False
+        self.dropped = 0
+        self.prefetch = max(1, prefetch)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._paths = iter_image_paths(spec)
+        self._window = deque()
+        self._produced = 0
+        self._current = None
+        self._fill()
+        self.exhausted = not self._window
+    
+    def _next_path(self) -> Optional[str]:
+        path = next(self._paths, None)
+        if path is None and self.loop and self._produced:
+            # Walk the dataset again for the next loop
+            self._paths = iter_image_paths(self.spec)
+            self._produced = 0
+            self.loops += 1
+            path = next(self._paths, None)
+        if path is not None:
+            self._produced += 1
+        return path
+    
+    def _fill(self):
+        while len(self._window) < self.prefetch:
+            path = self._next_path()
+            if path is None:
+                break
+            self._window.append(self._pool.submit(_decode_image, path))
+    
+    def isOpened(self) -> bool:
+        return not self.exhausted
+    
+    def _advance(self):
+        if not self._window:
+            self.exhausted = True
+            return None
+        future = self._window.popleft()
+        self._fill()
+        self.position += 1
+        return future
+    
+    def grab(self) -> bool:
+        """Take the next image from the prefetch window"""
+        future = self._advance()
+        if future is None:
+            return False
+        self._current = future
+        return True
+    
+    def skip(self, count: int) -> int:
+        """Drop up to count images, cancelling their decode if it hasn't started"""
+        skipped = 0
+        while skipped < count:
+            future = self._advance()
+            if future is None:
+                break
+            future.cancel()
+            skipped += 1
+        return skipped
+    
+    def retrieve(self) -> Optional[np.ndarray]:
+        """Wait for the last grabbed image to finish decoding"""
+        return self._current.result() if self._current is not None else None
+    
+    def read(self):
+        if not self.grab():
+            return False, None
+        frame = self.retrieve()
+        return frame is not None, frame
+    
+    def timestamp(self) -> float:
+        return max(0, self.position) / self.fps
+    
+    def release(self):
+        for future in self._window:
+            future.cancel()
+        self._window.clear()
+        self._pool.shutdown(wait=False)
+        self.exhausted = True
+
+
+def is_live_stream(spec: str) -> bool:
+    """Camera URLs, V4L2 devices and bare device indices are live; anything else is a file"""
+    spec = str(spec)
+    return spec.isdigit() or spec.lower().startswith(STREAM_PREFIXES)
+
+
+class LiveStreamSource:
+    """Live camera (RTSP/HTTP/V4L2) read by a background thread that keeps only the newest frame.
+    
+    Decoder backlog never builds up: frames that arrive before the consumer asks
+    for one replace the previous frame. A read failure or a stall longer than
+    stall_timeout (including a read that never returns) triggers a reconnect
+    with exponential backoff.
+    """
+    
+    def __init__(self, spec: str, stall_timeout: float = 5.0, backoff_initial: float = 0.5,
+                 backoff_max: float = 30.0):
+        self.spec = spec
+        self.stall_timeout = stall_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.fps = 30.0
+        self.frame_count = 0
+        self.position = -1
+        self.dropped = 0
+        
+        self._cond = threading.Condition()
+        self._frame = None
+        self._frame_time = 0.0
+        self._seq = 0
+        self._consumed_seq = 0
+        self._current = None
+        self._current_time = 0.0
+        self._running = True
+        
+        self.state = 'connecting'
+        self._session = 0
+        self._progress = 0.0
+        self._connected = False
+        self._delivered = False
+        self.reconnects = 0
+        self.last_error = None
+        self._received = 0
+        self._arrivals = deque()
+        
+        self._thread = threading.Thread(target=self._reader_loop, daemon=True)
+        self._thread.start()
+    
+    def _open(self):
+        if self.spec.isdigit():
+            return cv2.VideoCapture(int(self.spec))
+        if self.spec.startswith('/dev/video'):
+            return cv2.VideoCapture(self.spec, cv2.CAP_V4L2)
+        timeout_ms = int(self.stall_timeout * 1000)
+        return cv2.VideoCapture(self.spec, cv2.CAP_FFMPEG,
+                                [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms,
+                                 cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms])
+    
+    def _reader_loop(self):
+        """Watchdog: runs one capture session at a time and reconnects when it fails or stalls"""
+        backoff = self.backoff_initial
+        while self._running:
+            self._connected = False
+            self._delivered = False
+            self._progress = time.time()
+            session = threading.Thread(target=self._capture, args=(self._session,), daemon=True)
+            session.start()
+            while self._running and session.is_alive():
+                # Only FFmpeg honours a read timeout; V4L2 and device indices can block in
+                # cap.read() forever, so a session that stops delivering is abandoned here
+                if time.time() - self._progress > self.stall_timeout:
+                    self.last_error = 'stalled'
+                    break
+                session.join(timeout=0.1)
+            # A stuck session notices this once its read returns, then releases its capture
+            self._session += 1
+            if not self._running:
+                break
+            
+            if self._delivered:
+                # Connected and delivering before the outage: start again from a short backoff
+                backoff = self.backoff_initial
+            if self._connected:
+                self.state = 'reconnecting'
+                self.reconnects += 1
+                print(f"⚠️ {self.spec}: {self.last_error}, reconnecting in {backoff:.1f}s")
+            self._wait_backoff(backoff)
+            backoff = min(backoff * 2, self.backoff_max)
+        self.state = 'stopped'
+    
+    def _capture(self, session: int):
+        """One connection: deliver frames until a read fails or the watchdog abandons it"""
+        current = lambda: self._running and session == self._session
+        cap = self._open()
+        try:
+            if not cap.isOpened():
+                if current():
+                    self.last_error = 'open failed'
+                return
+            if not current():
+                return
+            self.fps = cap.get(cv2.CAP_PROP_FPS) or self.fps
+            self.state = 'live'
+            self._connected = True
+            print(f"📡 Connected to {self.spec}")
+            while current():
+                ok, frame = cap.read()
+                if not current():
+                    return
+                if not ok or frame is None:
+                    self.last_error = 'read failed'
+                    return
+                now = time.time()
+                with self._cond:
+                    if self._seq > self._consumed_seq:
+                        self.dropped += 1
+                    self._frame, self._frame_time = frame, now
+                    self._seq += 1
+                    self._cond.notify_all()
+                self._progress = now
+                if not self._delivered:
+                    # Delivering again: the outage that caused the reconnect is over
+                    self.last_error = None
+                    self._delivered = True
+                self._received += 1
+                self._arrivals.append(now)
+                while now - self._arrivals[0] > 5.0:
+                    self._arrivals.popleft()
+        finally:
+            cap.release()
+    
+    def _wait_backoff(self, seconds: float):
+        # Sleep in short steps so release() isn't held up by a long backoff
+        deadline = time.time() + seconds
+        while self._running and time.time() < deadline:
+            time.sleep(min(0.1, deadline - time.time()))
+    
+    def isOpened(self) -> bool:
+        return self._running
+    
+    def grab(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a frame newer than the last one taken"""
+        timeout = self.stall_timeout if timeout is None else timeout
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > self._consumed_seq or not self._running, timeout):
+                return False
+            if self._seq <= self._consumed_seq:
+                return False
+            self._consumed_seq = self._seq
+            self._current, self._current_time = self._frame, self._frame_time
+        self.position += 1
+        return True
+    
+    def skip(self, count: int) -> int:
+        """Live frames are never queued, so there is nothing to skip"""
+        return 0
+    
+    def retrieve(self) -> Optional[np.ndarray]:
+        return self._current
+    
+    def read(self):
+        if not self.grab():
+            return False, None
+        return True, self.retrieve()
+    
+    def timestamp(self) -> float:
+        """Wall-clock arrival time of the last grabbed frame"""
+        return self._current_time
+    
+    def health(self) -> Dict:
+        """Connection state and delivery statistics for this camera"""
+        now = time.time()
+        arrivals = list(self._arrivals)
+        span = arrivals[-1] - arrivals[0] if len(arrivals) > 1 else 0.0
+        age = now - self._frame_time if self._frame_time else None
+        state = self.state
+        if state == 'live' and age is not None and age > self.stall_timeout:
+            state = 'stalled'
+        return {
+            'source': self.spec,
+            'state': state,
+            'fps': round((len(arrivals) - 1) / span, 1) if span > 0 else 0.0,
+            'frames_received': self._received,
+            'frames_dropped': self.dropped,
+            'reconnects': self.reconnects,
+            'last_frame_age': round(age, 2) if age is not None else None,
+            'last_error': self.last_error,
+        }
+    
+    def release(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        self._thread.join(timeout=self.stall_timeout + 1.0)
+
+
+def keyframe_index(path: str) -> Optional[List[int]]:
+    """Indices of the keyframes in a video file, or None if the backend can't tell.
+    
+    Reads the file in raw (demux-only) mode, so no frame is decoded.
+    """
+    if not hasattr(cv2, 'CAP_PROP_LRF_HAS_KEY_FRAME'):
+        return None
+    cap = cv2.VideoCapture(path, cv2.CAP_FFMPEG)
+    if not cap.isOpened() or not cap.set(cv2.CAP_PROP_FORMAT, -1):
+        cap.release()
+        return None
+    keyframes = []
+    index = 0
+    while cap.grab():
+        if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+            keyframes.append(index)
+        index += 1
+    cap.release()
+    # No flags at all means the property isn't supported for this container
+    return keyframes or None
+
+
+def open_frame_source(spec: str, loop: bool = True, start: int = 0, end: Optional[int] = None,
+                      pacer: Optional[PlaybackPacer] = None):
+    """Frame source for a video file, image directory/glob or live camera URL.
+    
+    Video files can be limited to frames [start, end).
+    """
+    if is_live_stream(spec):
+        return LiveStreamSource(spec)
+    if is_image_sequence(spec):
+        return ImageSequenceSource(spec, loop=loop)
+    return VideoFileSource(spec, loop=loop, start=start, end=end, pacer=pacer)
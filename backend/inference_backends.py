@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Inference backends for QueueGuidance Web
+Every backend takes BGR images and returns one (N, 5) [x1, y1, x2, y2, conf]
+person-box array per image, so the counting code does not care which runs
+"""
+
+import cv2
+import numpy as np
+import os
+from pathlib import Path
+from typing import List, Optional
+
+from tiling import non_max_suppression
+from detection_cache import video_fingerprint
+
+PERSON_CLASS = 0
+# YOLOv8 downsamples by up to 32, so network inputs must be a multiple of it
+MODEL_STRIDE = 32
+
+
+def export_model(weights: str, fmt: str) -> str:
+    """Export a YOLO .pt model once and return the cached export path"""
+    weights_path = Path(weights)
+    if fmt == 'onnx':
+        target = weights_path.with_suffix('.onnx')
+    else:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    
+    if not target.exists():
+        from ultralytics import YOLO
+        print(f"📦 Exporting {weights_path.name} to {fmt} (first use only)...")
+        # Dynamic axes let one export serve any batch size and input size
+        exported = YOLO(str(weights_path)).export(format=fmt, dynamic=True)
+        if Path(exported) != target and Path(exported).exists():
+            os.replace(exported, target)
+        print(f"✅ Exported model cached at {target}")
+    return str(target)
+
+
+def sample_frames(video_path: str, count: int) -> List[np.ndarray]:
+    """Evenly spaced frames from a video, e.g. for INT8 calibration"""
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or count
+    frames = []
+    for index in np.linspace(0, max(0, total - 1), num=count).astype(int):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+        ret, frame = cap.read()
+        if ret:
+            frames.append(frame)
+    cap.release()
+    return frames
+
+
+def quantize_model(weights: str, mode: str = 'dynamic', calibration_video: Optional[str] = None,
+                   calibration_frames: int = 32, imgsz: int = 640) -> str:
+    """INT8-quantize the ONNX export once and return the cached model path"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic, quantize_static, CalibrationDataReader
+    
+    fp32_path = Path(export_model(weights, 'onnx'))
+    suffix = mode
+    if mode == 'static':
+        if not calibration_video:
+            raise ValueError("Static quantization needs a calibration video")
+        # Calibration ranges depend on the video, so each video gets its own model
+        suffix = f"{mode}-{video_fingerprint(calibration_video)[:12]}"
+    target = fp32_path.with_name(f"{fp32_path.stem}.int8-{suffix}.onnx")
+    if target.exists():
+        return str(target)
+    
+    print(f"🧮 Quantizing {fp32_path.name} to INT8 ({mode})...")
+    if mode == 'dynamic':
+        quantize_dynamic(str(fp32_path), str(target), weight_type=QuantType.QInt8)
+    elif mode == 'static':
+        frames = sample_frames(calibration_video, calibration_frames)
+        if not frames:
+            raise ValueError(f"No calibration frames could be read from {calibration_video}")
+        
+        class FrameReader(CalibrationDataReader):
+            def __init__(self, input_name):
+                self.batches = iter(
+                    {input_name: OnnxRuntimeBackend.to_blob([OnnxRuntimeBackend.letterbox(f, imgsz)[0]])}
+                    for f in frames
+                )
+            
+            def get_next(self):
+                return next(self.batches, None)
+        
+        import onnxruntime as ort
+        input_name = ort.InferenceSession(str(fp32_path), providers=['CPUExecutionProvider']).get_inputs()[0].name
+        quantize_static(str(fp32_path), str(target), FrameReader(input_name),
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    else:
+        raise ValueError(f"Unknown quantization mode: {mode}")
+    
+    print(f"✅ Quantized model cached at {target}")
+    return str(target)
+
+
+class InferenceBackend:
+    """Base class: person detection on a list of BGR images"""
+    
+    name = 'base'
+    
+    def predict(self, images: List[np.ndarray], conf: float, iou: float,
+                imgsz: int = 640) -> List[np.ndarray]:
+        raise NotImplementedError
+    
+    def warmup(self, imgsz: int = 640):
+        """Run one dummy inference so the first real frame isn't slow"""
+        self.predict([np.zeros((imgsz, imgsz, 3), dtype=np.uint8)], conf=0.25, iou=0.5, imgsz=imgsz)
+
+
+class TorchBackend(InferenceBackend):
+    """Ultralytics YOLO in PyTorch eager mode"""
+    
+    name = 'torch'
+    
+    def __init__(self, weights: str, threads: Optional[int] = None):
+        from ultralytics import YOLO
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        self.model = YOLO(weights)
+    
+    def predict(self, images, conf, iou, imgsz=640):
+        results = self.model(list(images), conf=conf, iou=iou, classes=[PERSON_CLASS],
+                             imgsz=imgsz, verbose=False)
+        all_boxes = []
+        for result in results:
+            # One host transfer per image instead of one per box
+            boxes = np.empty((len(result.boxes), 5), dtype=np.float32)
+            boxes[:, :4] = result.boxes.xyxy.cpu().numpy().reshape(-1, 4)
+            boxes[:, 4] = result.boxes.conf.cpu().numpy().reshape(-1)
+            all_boxes.append(boxes)
+        return all_boxes
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """ONNX Runtime on CPU, with YOLOv8 pre/post-processing done in NumPy"""
+    
+    name = 'onnx'
+    
+    def __init__(self, weights: str, threads: Optional[int] = None, max_det: int = 300, **kwargs):
+        import onnxruntime as ort
+        model_path = weights if weights.endswith('.onnx') else self._model_path(weights, **kwargs)
+        
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.max_det = max_det
+    
+    def _model_path(self, weights: str, **kwargs) -> str:
+        return export_model(weights, 'onnx')
+    
+    @staticmethod
+    def letterbox(image, imgsz: int):
+        """Resize keeping aspect ratio and pad to imgsz x imgsz (Ultralytics LetterBox rules)"""
+        # Round up to the model stride, as Ultralytics does for --imgsz
+        imgsz = -(-imgsz // MODEL_STRIDE) * MODEL_STRIDE
+        h, w = image.shape[:2]
+        gain = min(imgsz / h, imgsz / w)
+        new_w, new_h = int(round(w * gain)), int(round(h * gain))
+        pad_x, pad_y = (imgsz - new_w) / 2, (imgsz - new_h) / 2
+        if (new_w, new_h) != (w, h):
+            image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+        left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+        image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT,
+                                   value=(114, 114, 114))
+        return image, gain, (left, top)
+    
+    def _decode(self, output: np.ndarray, conf: float, iou: float, gain: float, pad, shape):
+        """Person boxes from one (4 + classes, anchors) YOLOv8 output in image coordinates"""
+        output = output.T
+        scores = output[:, 4:]
+        best = scores.argmax(axis=1)
+        best_conf = scores[np.arange(len(scores)), best]
+        # Same rule as Ultralytics NMS: best class must be person and above conf
+        keep = (best == PERSON_CLASS) & (best_conf > conf)
+        cx, cy, bw, bh = output[keep, :4].T
+        
+        boxes = np.empty((int(keep.sum()), 5), dtype=np.float32)
+        boxes[:, 0] = cx - bw / 2
+        boxes[:, 1] = cy - bh / 2
+        boxes[:, 2] = cx + bw / 2
+        boxes[:, 3] = cy + bh / 2
+        boxes[:, 4] = best_conf[keep]
+        boxes = non_max_suppression(boxes, iou)
+        boxes = boxes[np.argsort(-boxes[:, 4], kind='stable')][:self.max_det]
+        
+        # Undo letterboxing
+        h, w = shape[:2]
+        boxes[:, [0, 2]] = np.clip((boxes[:, [0, 2]] - pad[0]) / gain, 0, w)
+        boxes[:, [1, 3]] = np.clip((boxes[:, [1, 3]] - pad[1]) / gain, 0, h)
+        return boxes
+    
+    def _run(self, blob: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: blob})[0]
+    
+    @staticmethod
+    def to_blob(letterboxed: List[np.ndarray]) -> np.ndarray:
+        """BGR HWC uint8 images -> RGB NCHW float32 in [0, 1]"""
+        blob = np.stack(letterboxed)[..., ::-1].transpose(0, 3, 1, 2)
+        return np.ascontiguousarray(blob, dtype=np.float32) / 255.0
+    
+    def predict(self, images, conf, iou, imgsz=640):
+        prepared = [self.letterbox(image, imgsz) for image in images]
+        blob = self.to_blob([p[0] for p in prepared])
+        outputs = self._run(blob)
+        return [
+            self._decode(output, conf, iou, gain, pad, image.shape)
+            for output, (_, gain, pad), image in zip(outputs, prepared, images)
+        ]
+
+
+class OpenVINOBackend(OnnxRuntimeBackend):
+    """OpenVINO runtime on the ONNX export, sharing the NumPy pre/post-processing"""
+    
+    name = 'openvino'
+    
+    def __init__(self, weights: str, threads: Optional[int] = None, max_det: int = 300):
+        import openvino as ov
+        model_path = weights if weights.endswith('.onnx') else export_model(weights, 'onnx')
+        config = {'INFERENCE_NUM_THREADS': threads} if threads else {}
+        self.compiled = ov.Core().compile_model(model_path, 'CPU', config)
+        self.max_det = max_det
+    
+    def _run(self, blob: np.ndarray) -> np.ndarray:
+        return self.compiled(blob)[self.compiled.output(0)]
+
+
+class OnnxInt8Backend(OnnxRuntimeBackend):
+    """ONNX Runtime on a dynamically quantized INT8 model"""
+    
+    name = 'onnx-int8'
+    mode = 'dynamic'
+    
+    def _model_path(self, weights: str, calibration_video: Optional[str] = None, **kwargs) -> str:
+        return quantize_model(weights, self.mode, calibration_video=calibration_video)
+
+
+class OnnxInt8StaticBackend(OnnxInt8Backend):
+    """ONNX Runtime on an INT8 model statically calibrated on frames of the video"""
+    
+    name = 'onnx-int8-static'
+    mode = 'static'
+
+
+BACKENDS = {
+    'torch': TorchBackend,
+    'onnx': OnnxRuntimeBackend,
+    'onnx-int8': OnnxInt8Backend,
+    'onnx-int8-static': OnnxInt8StaticBackend,
+    'openvino': OpenVINOBackend,
+}
+
+
+def create_backend(name: str, weights: str, threads: Optional[int] = None,
+                   calibration_video: Optional[str] = None) -> InferenceBackend:
+    """Build the named backend for the given YOLO weights"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}', choose from {', '.join(BACKENDS)}")
+    if name.startswith('onnx-int8'):
+        return BACKENDS[name](weights, threads=threads, calibration_video=calibration_video)
+    return BACKENDS[name](weights, threads=threads)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Persistent detector daemon for QueueGuidance Web
+Loads and warms the model once, then runs detection jobs sent over a local socket
+"""
+
+import json
+import socket
+import socketserver
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+# Detector imports stay inside the server so the Streamlit app can import
+# send_command without pulling in the model stack
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+def send_command(command: Dict, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 timeout: float = 15.0) -> Optional[Dict]:
+    """Send one JSON command to the daemon; None if it isn't running"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as conn:
+            conn.sendall((json.dumps(command) + '\n').encode())
+            reply = conn.makefile('r').readline()
+        return json.loads(reply) if reply else None
+    except (OSError, ValueError):
+        return None
+
+
+class DetectorServer:
+    """Owns one warm model and at most one running detection job"""
+    
+    def __init__(self, backend: str = 'torch', imgsz: int = 640):
+        self.backend_name = backend
+        self.imgsz = imgsz
+        self.backend = None
+        self.detector = None
+        self.job_thread = None
+        self.job = None
+        self.lock = threading.Lock()
+        self.data_dir = Path(__file__).parent.parent / 'data'
+    
+    def load(self):
+        """Load and warm up the model once for all future jobs"""
+        from detection_engine import default_model_path
+        from inference_backends import create_backend
+        
+        model_path = default_model_path()
+        print(f"🤖 Loading model: {model_path} ({self.backend_name} backend)")
+        self.backend = create_backend(self.backend_name, model_path)
+        self.backend.warmup(self.imgsz)
+        print("✅ Model loaded and warmed up")
+    
+    def _stop_job(self) -> bool:
+        """Stop the running job and wait for its threads to finish; False if it didn't stop"""
+        if self.detector is not None:
+            self.detector.stop()
+        if self.job_thread is not None:
+            self.job_thread.join(timeout=10.0)
+            if self.job_thread.is_alive():
+                return False
+        self.detector = None
+        self.job_thread = None
+        self.job = None
+        return True
+    
+    def start_job(self, video: str, polygons=None, options: Optional[Dict] = None) -> Dict:
+        """Switch to a new video/polygons job without reloading the model"""
+        from detection_engine import WebQueueDetector
+        
+        if polygons is None:
+            polygon_file = self.data_dir / 'polygons.json'
+            if not polygon_file.exists():
+                return {'ok': False, 'error': 'No polygons found. Run with --mode polygon first'}
+            with open(polygon_file) as f:
+                polygons = json.load(f)['polygons']
+        
+        with self.lock:
+            # Never run two jobs on the shared (not thread-safe) model
+            if not self._stop_job():
+                return {'ok': False, 'error': 'Previous job did not stop in time'}
+            options = dict(options or {})
+            options.update(backend=self.backend_name, imgsz=self.imgsz)
+            detector = WebQueueDetector(video, polygons, **options)
+            detector.backend = self.backend
+            self.detector = detector
+            self.job = {'video': video, 'queues': len(polygons)}
+            self.job_thread = threading.Thread(target=detector.run, kwargs={'show_window': False},
+                                               daemon=True)
+            self.job_thread.start()
+        print(f"🎬 Job started: {video} ({len(polygons)} queues)")
+        return {'ok': True, 'job': self.job}
+    
+    def stop_job(self) -> Dict:
+        with self.lock:
+            was_running = self.job is not None
+            if not self._stop_job():
+                return {'ok': False, 'error': 'Job did not stop in time'}
+        return {'ok': True, 'stopped': was_running}
+    
+    def status(self) -> Dict:
+        running = self.job_thread is not None and self.job_thread.is_alive()
+        return {'ok': True, 'running': running, 'job': self.job, 'backend': self.backend_name}
+    
+    def handle(self, command: Dict) -> Dict:
+        """Dispatch one command: start / stop / status"""
+        cmd = command.get('cmd')
+        if cmd == 'start':
+            if not command.get('video'):
+                return {'ok': False, 'error': "'start' needs a video path"}
+            return self.start_job(command['video'], command.get('polygons'), command.get('options'))
+        if cmd == 'stop':
+            return self.stop_job()
+        if cmd == 'status':
+            return self.status()
+        return {'ok': False, 'error': f"Unknown command: {cmd}"}
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    """One JSON command per line, one JSON reply per line"""
+    
+    def handle(self):
+        for line in self.rfile:
+            try:
+                reply = self.server.detector_server.handle(json.loads(line))
+            except Exception as e:
+                reply = {'ok': False, 'error': str(e)}
+            self.wfile.write((json.dumps(reply) + '\n').encode())
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def main():
+    """Main entry point"""
+    import argparse
+    from inference_backends import BACKENDS
+    
+    parser = argparse.ArgumentParser(description='QueueGuidance detector daemon')
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help='Address to listen on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on')
+    # Static INT8 is calibrated on each job's video, so it can't be loaded up front
+    parser.add_argument('--backend', type=str, default='torch',
+                       choices=[name for name in BACKENDS if name != 'onnx-int8-static'],
+                       help='Inference runtime')
+    parser.add_argument('--imgsz', type=int, default=640, help='Model input size')
+    args = parser.parse_args()
+    
+    server = DetectorServer(args.backend, args.imgsz)
+    server.load()
+    
+    with _ThreadingServer((args.host, args.port), _CommandHandler) as tcp_server:
+        tcp_server.detector_server = server
+        print(f"📡 Detector daemon listening on {args.host}:{args.port}")
+        try:
+            tcp_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop_job()
+    print("✅ Detector daemon stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Motion gate for QueueGuidance Web
+Cheap frame differencing inside the queue zones to decide whether YOLO needs to run
+"""
+
+import cv2
+import numpy as np
+import time
+from typing import List, Optional
+
+
+class MotionGate:
+    """Skip inference while nothing moves inside the queue zones"""
+    
+    def __init__(self, threshold: float = 0.005, pixel_delta: int = 25,
+                 max_interval: float = 5.0, width: int = 160):
+        # threshold: fraction of zone pixels that must change to trigger inference
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        # Force a full inference at least this often (seconds) so counts never go stale
+        self.max_interval = max_interval
+        self.width = width
+        self.reference = None
+        self.last_inference = 0.0
+        self.last_activity = 0.0
+        self._mask = None
+        self._mask_key = None
+    
+    def _zone_mask(self, small_shape, frame_shape, polygons: List):
+        """Binary mask of all zones at the downscaled resolution"""
+        key = (small_shape, tuple(frame_shape[:2]), tuple(tuple(map(tuple, p)) for p in polygons))
+        if key != self._mask_key:
+            scale = small_shape[1] / frame_shape[1]
+            mask = np.zeros(small_shape, dtype=np.uint8)
+            for polygon in polygons:
+                pts = np.round(np.asarray(polygon, dtype=np.float64) * scale).astype(np.int32)
+                cv2.fillPoly(mask, [pts], 1)
+            self._mask = mask.astype(bool)
+            self._mask_key = key
+        return self._mask
+    
+    def _downscale(self, frame):
+        """Small grayscale copy used for differencing"""
+        h, w = frame.shape[:2]
+        small_h = max(1, int(round(h * self.width / w)))
+        small = cv2.resize(frame, (self.width, small_h), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    
+    def should_infer(self, frame, polygons: List, timestamp: Optional[float] = None) -> bool:
+        """True if the zones changed since the last inference (or it is overdue).
+        
+        timestamp is the frame's time in seconds (wall clock if omitted), so
+        max_interval counts video time when frames are decoded faster than real time.
+        """
+        gray = self._downscale(frame)
+        now = time.time() if timestamp is None else timestamp
+        # Time going backwards means the video looped or seeked: re-detect
+        overdue = not 0 <= now - self.last_inference < self.max_interval
+        
+        if self.reference is None or self.reference.shape != gray.shape or overdue:
+            self.last_activity = 1.0
+        else:
+            mask = self._zone_mask(gray.shape, frame.shape, polygons)
+            changed = cv2.absdiff(gray, self.reference) > self.pixel_delta
+            self.last_activity = float(np.count_nonzero(changed & mask)) / max(1, np.count_nonzero(mask))
+            if self.last_activity < self.threshold:
+                return False
+        
+        # Compare future frames against the one we are about to run inference on
+        self.reference = gray
+        self.last_inference = now
+        return True
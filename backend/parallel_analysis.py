@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Parallel offline analysis for QueueGuidance Web
+Splits a long video into keyframe-aligned segments, analyses each in its own
+process with its own model, and merges the per-segment time series
+"""
+
+import os
+import sys
+import time
+import queue
+import multiprocessing as mp
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from frame_sources import keyframe_index
+from analysis import (ProgressReporter, analysis_output_path, merge_series, replay_counts,
+                      save_timeseries, summarize, print_summary)
+from smoothing import CountSmoother
+from queue_stats import ServiceRateEstimator
+
+
+def plan_segments(frame_count: int, workers: int, keyframes: Optional[List[int]] = None,
+                  warmup_frames: int = 0) -> List[Tuple[int, int, int]]:
+    """Split [0, frame_count) into up to `workers` segments.
+
+    Returns (warmup_start, start, end) per segment. Boundaries snap to the nearest
+    earlier keyframe when an index is available, and each worker starts decoding
+    at the keyframe before start - warmup_frames so its seek lands on a keyframe.
+    """
+    keys = np.asarray(sorted(keyframes) if keyframes else [], dtype=np.int64)
+
+    def snap(index):
+        if index <= 0:
+            return 0
+        if len(keys) == 0:
+            return index
+        pos = np.searchsorted(keys, index, side='right') - 1
+        return int(keys[pos]) if pos >= 0 else 0
+
+    bounds = sorted({snap(frame_count * i // workers) for i in range(workers)} | {0})
+    bounds.append(frame_count)
+    return [(snap(start - warmup_frames), start, end)
+            for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def _segment_worker(slot, video_path, polygons, options, segment, stride, threads, done, results):
+    """Worker process: analyse one segment with its own detector and model"""
+    import cv2
+    cv2.setNumThreads(threads)
+    from detection_engine import WebQueueDetector
+
+    warmup_start, start, end = segment
+    try:
+        detector = WebQueueDetector(video_path, polygons, **dict(options, backend_threads=threads))
+
+        def report(index):
+            done[slot] = index + 1 - warmup_start
+
+        series = detector.analyze_segment(start, end, stride=stride, warmup_start=warmup_start,
+                                          on_progress=report)
+        if series is None:
+            results.put((slot, None, 'Cannot open video or load model'))
+        else:
+            results.put((slot, series, None))
+    except Exception as e:
+        results.put((slot, None, str(e)))
+
+
+def analyze_parallel(video_path: str, polygons: List, options: Dict, workers: Optional[int] = None,
+                     stride: int = 2, output_path: Optional[str] = None,
+                     warmup_seconds: float = 2.0, data_dir: Optional[Path] = None):
+    """Analyse a video with one detector process per core and save the merged time series.
+
+    Smoothing and wait estimates are recomputed over the merged raw counts, so they
+    carry across segment boundaries. Without tracking this matches a single pass;
+    with tracking, waits use the per-person estimate rather than tracked exits.
+    """
+    import cv2
+    data_dir = Path(data_dir) if data_dir else Path(__file__).parent.parent / 'data'
+    output_path = Path(output_path) if output_path else analysis_output_path(data_dir, video_path)
+
+    cap = cv2.VideoCapture(video_path)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    if frame_count <= 0:
+        print(f"❌ Cannot open video")
+        return None
+
+    cores = os.cpu_count() or 1
+    workers = max(1, min(workers or cores, cores))
+    threads = max(1, cores // workers)
+
+    print(f"🔑 Indexing keyframes...")
+    keyframes = keyframe_index(video_path)
+    if keyframes is None:
+        print("⚠️ Keyframe index unavailable, using uniform segments")
+    segments = plan_segments(frame_count, workers, keyframes, warmup_frames=int(warmup_seconds * fps))
+    print(f"\n📈 Parallel Analysis Started - {len(segments)} segments, {threads} thread(s) each, "
+          f"1 of every {stride} frames")
+
+    progress = ProgressReporter(data_dir / 'analysis_progress.json', video_path,
+                                sum(end - warmup for warmup, _, end in segments))
+    # spawn gives every worker a clean OpenCV / model state on all platforms
+    ctx = mp.get_context('spawn')
+    done = ctx.Array('q', len(segments), lock=False)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=_segment_worker,
+                             args=(slot, video_path, polygons, options, segment, stride, threads, done, results),
+                             daemon=True)
+                 for slot, segment in enumerate(segments)]
+    for process in processes:
+        process.start()
+
+    pieces = {}
+    try:
+        while len(pieces) < len(segments):
+            try:
+                slot, series, error = results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(p.is_alive() for p in processes):
+                    raise RuntimeError('Analysis worker exited without a result')
+            else:
+                if error:
+                    raise RuntimeError(f"Segment {slot + 1}: {error}")
+                pieces[slot] = series
+            status = progress.update(sum(done))
+            print(f"⏳ {(status['progress'] or 0):.0%} | {status['fps']} frames/s | ETA {status['eta_seconds']}s")
+    except Exception as e:
+        progress.fail(str(e))
+        raise
+    finally:
+        for process in processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+
+    series = merge_series([pieces[slot] for slot in range(len(segments))])
+    series = replay_counts(series, CountSmoother(len(polygons), window=options.get('smooth_window', 5),
+                                                 method=options.get('smooth_filter', 'mean')),
+                           ServiceRateEstimator(len(polygons)))
+    summary = summarize(series, time.time() - progress.started)
+    save_timeseries(output_path, series, {
+        'video_path': video_path,
+        'polygons': polygons,
+        'stride': stride,
+        'segments': segments,
+        'summary': summary,
+    })
+    progress.finish(str(output_path), summary)
+    print_summary(summary, output_path)
+    return summary
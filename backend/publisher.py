@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Snapshot publisher for QueueGuidance Web
+Runs the publish step (annotate, encode, write) on its own thread at a fixed
+rate, always on the newest result, so inference never waits on disk
+"""
+
+import os
+import time
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+
+def write_atomic(path: Path, data: bytes, retries: int = 5):
+    """Write to a temp file next to path and rename it over path.
+
+    Readers see either the old or the new file, never a partial one. On Windows
+    the rename fails while a reader has the file open, so it is retried briefly.
+    """
+    path = Path(path)
+    temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(temp, 'wb') as f:
+        f.write(data)
+    for attempt in range(retries):
+        try:
+            os.replace(temp, path)
+            return
+        except PermissionError:
+            if attempt == retries - 1:
+                os.remove(temp)
+                raise
+            time.sleep(0.02)
+
+
+class CoalescingPublisher:
+    """Publishes the latest submitted item at most `rate` times per second.
+
+    submit() never blocks: an item that hasn't been published yet is simply
+    replaced by the newer one (counted in `coalesced`).
+    """
+
+    def __init__(self, publish: Callable[[Any], None], rate: float = 2.0):
+        self.publish = publish
+        # rate <= 0 publishes every item as soon as the worker is free
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self.published = 0
+        self.coalesced = 0
+        self._cond = threading.Condition()
+        self._pending = None
+        self._has_pending = False
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any):
+        with self._cond:
+            if self._has_pending:
+                self.coalesced += 1
+            self._pending, self._has_pending = item, True
+            self._cond.notify()
+
+    def _take(self, timeout: Optional[float] = None):
+        with self._cond:
+            self._cond.wait_for(lambda: self._has_pending or not self._running, timeout)
+            if not self._has_pending:
+                return False, None
+            item, self._pending, self._has_pending = self._pending, None, False
+            return True, item
+
+    def _publish(self, item):
+        try:
+            self.publish(item)
+            self.published += 1
+        except Exception as e:
+            # A failed write must not kill the publisher; the next snapshot retries
+            print(f"⚠️ Publish failed: {e}")
+
+    def _loop(self):
+        next_slot = 0.0
+        while self._running:
+            ok, item = self._take(timeout=0.5)
+            if not ok:
+                continue
+            started = time.time()
+            self._publish(item)
+            # Next slot is one interval after this publish began (or after the previous slot)
+            next_slot = max(next_slot, started) + self.interval
+            # Sleep out the rest of the slot; newer items keep replacing the pending one
+            while self._running and time.time() < next_slot:
+                time.sleep(min(0.05, next_slot - time.time()))
+
+    def stop(self, timeout: float = 2.0):
+        """Stop the worker, publishing the last pending item so the final state is on disk"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        ok, item = self._take(timeout=0)
+        if ok:
+            self._publish(item)
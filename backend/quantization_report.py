@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+INT8 vs FP32 comparison report for QueueGuidance Web
+Runs the FP32 and INT8 ONNX models on the same clip and compares per-zone counts and FPS
+"""
+
+import json
+import time
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from detection_engine import WebQueueDetector, default_model_path
+from inference_backends import create_backend
+
+
+def read_clip(video_path: str, max_frames: int, stride: int) -> List[np.ndarray]:
+    """Consecutive frames from the start of the video, keeping 1 of every stride"""
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    index = 0
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % stride == 0:
+            frames.append(frame)
+        index += 1
+    cap.release()
+    return frames
+
+
+def evaluate_backend(backend_name: str, video_path: str, polygons: List,
+                     frames: List[np.ndarray]) -> Dict:
+    """Per-frame raw queue counts and throughput of one backend on the clip"""
+    detector = WebQueueDetector(video_path, polygons, backend=backend_name)
+    detector.backend = create_backend(backend_name, default_model_path(),
+                                      calibration_video=video_path)
+    detector.backend.warmup(detector.imgsz)
+    
+    counts = []
+    started = time.time()
+    for frame in frames:
+        queue_counts, _ = detector.detect_and_count(frame)
+        counts.append(queue_counts)
+    elapsed = time.time() - started
+    
+    return {
+        'backend': backend_name,
+        'counts': np.array(counts, dtype=np.int64).reshape(len(frames), len(polygons)),
+        'fps': len(frames) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def compare(reference: Dict, candidate: Dict) -> Dict:
+    """Per-zone accuracy of the candidate against the reference counts"""
+    ref, cand = reference['counts'], candidate['counts']
+    diff = cand - ref
+    return {
+        'reference': reference['backend'],
+        'candidate': candidate['backend'],
+        'frames': int(len(ref)),
+        'reference_fps': round(reference['fps'], 2),
+        'candidate_fps': round(candidate['fps'], 2),
+        'speedup': round(candidate['fps'] / reference['fps'], 2) if reference['fps'] else None,
+        'zones': [
+            {
+                'queue': i + 1,
+                'reference_mean': round(float(ref[:, i].mean()), 2) if len(ref) else 0.0,
+                'candidate_mean': round(float(cand[:, i].mean()), 2) if len(ref) else 0.0,
+                'mean_abs_error': round(float(np.abs(diff[:, i]).mean()), 3) if len(ref) else 0.0,
+                'exact_match_rate': round(float((diff[:, i] == 0).mean()), 3) if len(ref) else 1.0,
+            }
+            for i in range(ref.shape[1])
+        ],
+        'overall_exact_match_rate': round(float((diff == 0).all(axis=1).mean()), 3) if len(ref) else 1.0,
+    }
+
+
+def main():
+    """Main entry point"""
+    import argparse
+    
+    data_dir = Path(__file__).parent.parent / 'data'
+    
+    parser = argparse.ArgumentParser(description='Compare INT8 and FP32 person detectors on a clip')
+    parser.add_argument('--video', type=str, default=None,
+                       help='Clip to evaluate (default: the video in data/polygons.json)')
+    parser.add_argument('--quantization', type=str, default='dynamic', choices=['dynamic', 'static'],
+                       help='INT8 flavour; static calibrates on frames sampled from the video')
+    parser.add_argument('--frames', type=int, default=200, help='Frames to evaluate')
+    parser.add_argument('--stride', type=int, default=2, help='Use 1 of every N frames')
+    args = parser.parse_args()
+    
+    polygon_file = data_dir / 'polygons.json'
+    if not polygon_file.exists():
+        print("❌ No polygons found. Run detection_engine.py --mode polygon first")
+        return
+    with open(polygon_file) as f:
+        polygon_data = json.load(f)
+    video_path = args.video or polygon_data['video_path']
+    polygons = polygon_data['polygons']
+    
+    frames = read_clip(video_path, args.frames, args.stride)
+    if not frames:
+        print(f"❌ Cannot read video: {video_path}")
+        return
+    
+    int8_backend = 'onnx-int8' if args.quantization == 'dynamic' else 'onnx-int8-static'
+    print(f"🧪 Comparing onnx (FP32) vs {int8_backend} on {len(frames)} frames")
+    fp32 = evaluate_backend('onnx', video_path, polygons, frames)
+    int8 = evaluate_backend(int8_backend, video_path, polygons, frames)
+    report = compare(fp32, int8)
+    report['video_path'] = video_path
+    report['timestamp'] = datetime.now().isoformat()
+    
+    with open(data_dir / 'quantization_report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    
+    print(f"⚡ FPS: FP32 {report['reference_fps']} | INT8 {report['candidate_fps']} "
+          f"(x{report['speedup']})")
+    for zone in report['zones']:
+        print(f"  Q{zone['queue']}: FP32 {zone['reference_mean']} | INT8 {zone['candidate_mean']} | "
+              f"MAE {zone['mean_abs_error']} | exact {zone['exact_match_rate']:.0%}")
+    print(f"💾 Report saved to {data_dir / 'quantization_report.json'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Streaming queue statistics for QueueGuidance Web
+Constant-memory per-queue bookkeeping built from tracked person identities
+"""
+
+import math
+import numpy as np
+from typing import Dict, List, Optional
+
+
+class P2Quantile:
+    """Streaming quantile estimate in O(1) memory (Jain & Chlamtac P-square algorithm)"""
+    
+    def __init__(self, p: float):
+        self.p = p
+        self.count = 0
+        self.heights: List[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+    
+    def add(self, value: float):
+        self.count += 1
+        if self.count <= 5:
+            self.heights.append(value)
+            self.heights.sort()
+            return
+        
+        q = self.heights
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= value < q[i + 1])
+        
+        for i in range(k + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        
+        # Nudge the three middle markers towards their desired positions
+        for i in range(1, 4):
+            d = self.desired[i] - self.positions[i]
+            if (d >= 1 and self.positions[i + 1] - self.positions[i] > 1) or \
+                    (d <= -1 and self.positions[i - 1] - self.positions[i] < -1):
+                step = 1 if d > 0 else -1
+                candidate = self._parabolic(i, step)
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + step * (q[i + step] - q[i]) / (self.positions[i + step] - self.positions[i])
+                q[i] = candidate
+                self.positions[i] += step
+    
+    def _parabolic(self, i: int, step: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+    
+    def value(self) -> Optional[float]:
+        if self.count == 0:
+            return None
+        if self.count <= 5:
+            # Exact quantile (nearest rank) while we still hold every sample
+            return self.heights[min(len(self.heights) - 1, max(0, math.ceil(self.p * len(self.heights)) - 1))]
+        return self.heights[2]
+
+
+def head_band(polygon, depth: float = 0.25):
+    """(origin, unit normal, band) of a zone's head: the first edge drawn is the front of the line.
+    
+    A point is at the head when its distance from that edge's line is within
+    `depth` of the zone's extent away from it.
+    """
+    points = np.asarray(polygon, dtype=np.float64)
+    origin, direction = points[0], points[1] - points[0]
+    length = np.hypot(*direction)
+    normal = np.array([-direction[1], direction[0]]) / length if length > 0 else np.zeros(2)
+    extent = np.abs((points - origin) @ normal).max()
+    return origin, normal, depth * extent
+
+
+class QueueDwellStats:
+    """Per-queue dwell times from track entry/exit, O(1) work per tracked person update"""
+    
+    def __init__(self, num_queues: int, exit_grace: float = 2.0, polygons: Optional[List] = None,
+                 head_depth: float = 0.25):
+        # A person only counts as gone after being absent this many seconds,
+        # so a missed detection doesn't split one visit into two
+        self.exit_grace = exit_grace
+        # Only people last seen at the head of a zone were served; others left the line
+        self.heads = [head_band(p, head_depth) for p in polygons] if polygons else None
+        self.present: List[Dict[int, List[float]]] = [dict() for _ in range(num_queues)]
+        self.entry_sums = [0.0] * num_queues
+        self.served = [0] * num_queues
+        self.completed_sums = [0.0] * num_queues
+        self.p50 = [P2Quantile(0.5) for _ in range(num_queues)]
+        self.p90 = [P2Quantile(0.9) for _ in range(num_queues)]
+    
+    def _at_head(self, queue: int, x: float, y: float) -> bool:
+        if self.heads is None:
+            return True
+        origin, normal, band = self.heads[queue]
+        return abs((x - origin[0]) * normal[0] + (y - origin[1]) * normal[1]) <= band
+    
+    def update(self, detections: List[Dict], timestamp: float) -> List[int]:
+        """Feed one frame of tracked detections; returns people served (left via the head) per queue"""
+        exits = [0] * len(self.present)
+        for det in detections:
+            queue, track_id = det.get('queue', -1), det.get('track_id')
+            if track_id is None or not 0 <= queue < len(self.present):
+                continue
+            x, y = det.get('center', (0.0, 0.0))
+            visit = self.present[queue].get(track_id)
+            if visit is None:
+                self.present[queue][track_id] = [timestamp, timestamp, x, y]
+                self.entry_sums[queue] += timestamp
+            else:
+                visit[1:] = timestamp, x, y
+        
+        for queue, visits in enumerate(self.present):
+            gone = [tid for tid, visit in visits.items() if timestamp - visit[1] > self.exit_grace]
+            for track_id in gone:
+                entered, last_seen, x, y = visits.pop(track_id)
+                self.entry_sums[queue] -= entered
+                dwell = last_seen - entered
+                self.served[queue] += 1
+                self.completed_sums[queue] += dwell
+                self.p50[queue].add(dwell)
+                self.p90[queue].add(dwell)
+                if self._at_head(queue, x, y):
+                    exits[queue] += 1
+        
+        return exits
+    
+    def summary(self, timestamp: float) -> List[Dict]:
+        """Dwell-time statistics per queue, in seconds"""
+        stats = []
+        for queue, visits in enumerate(self.present):
+            waiting = len(visits)
+            current_mean = timestamp - self.entry_sums[queue] / waiting if waiting else 0.0
+            served = self.served[queue]
+            p50, p90 = self.p50[queue].value(), self.p90[queue].value()
+            stats.append({
+                'waiting': waiting,
+                'current_mean': round(current_mean, 1),
+                'served': served,
+                'completed_mean': round(self.completed_sums[queue] / served, 1) if served else None,
+                'p50': round(p50, 1) if p50 is not None else None,
+                'p90': round(p90, 1) if p90 is not None else None,
+            })
+        return stats
+
+
+class ServiceRateEstimator:
+    """Sliding-window service rate per queue from tracked head exits, constant memory per queue.
+    
+    Without exits (no tracking) every queue keeps the default per-person service time.
+    """
+    
+    def __init__(self, num_queues: int, window: float = 300.0, buckets: int = 30,
+                 default_service_time: float = 120.0):
+        # Exits are binned into a ring of time buckets spanning `window` seconds
+        self.bucket_seconds = window / buckets
+        self.counts = [[0] * buckets for _ in range(num_queues)]
+        self.current_bucket = None
+        self.started = None
+        self.window = window
+        # Used until a queue has served anyone (the old 2 min/person heuristic)
+        self.default_service_time = default_service_time
+    
+    def _advance(self, timestamp: float):
+        """Clear buckets that fell out of the window since the last update"""
+        bucket = int(timestamp // self.bucket_seconds)
+        if self.current_bucket is None:
+            self.current_bucket = bucket
+            self.started = timestamp
+            return
+        size = len(self.counts[0]) if self.counts else 0
+        for b in range(self.current_bucket + 1, min(bucket, self.current_bucket + size) + 1):
+            for ring in self.counts:
+                ring[b % size] = 0
+        self.current_bucket = max(self.current_bucket, bucket)
+    
+    def add_exits(self, exits: List[int], timestamp: float):
+        """Record people who left each queue at timestamp"""
+        self._advance(timestamp)
+        for ring, n in zip(self.counts, exits):
+            if n:
+                ring[self.current_bucket % len(ring)] += n
+    
+    def rates(self, timestamp: float) -> List[float]:
+        """People served per minute over the window (0 if nobody yet)"""
+        if self.started is None:
+            return [0.0] * len(self.counts)
+        span = min(self.window, max(timestamp - self.started, self.bucket_seconds))
+        return [sum(ring) / span * 60.0 for ring in self.counts]
+    
+    def expected_waits(self, queue_counts: List[int], timestamp: float) -> List[float]:
+        """Expected wait in minutes: people in line divided by the measured service rate"""
+        waits = []
+        for count, rate in zip(queue_counts, self.rates(timestamp)):
+            if rate > 0:
+                waits.append(count / rate)
+            else:
+                waits.append(count * self.default_service_time / 60.0)
+        return waits
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Re-zoning for QueueGuidance Web
+Recomputes queue counts, smoothing and recommendations for new polygons from the
+detections stored in the detection cache, without running the model again
+"""
+
+import sys
+import json
+import time
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from zones import ZoneMask
+from smoothing import smooth_series, FILTERS
+from queue_stats import ServiceRateEstimator
+from detection_cache import find_cache, read_cache
+from analysis import replay_waits, rank_series, save_timeseries, summarize, print_summary
+
+
+def count_series(offsets: np.ndarray, boxes: np.ndarray, polygons: List, frame_shape: Tuple[int, int],
+                 min_box_area_ratio: float = 0.003, zone_mask: Optional[ZoneMask] = None) -> np.ndarray:
+    """(frames, zones) people counts for every cached frame at once.
+
+    Same rules as WebQueueDetector.count_detections: tiny boxes are dropped and each
+    person is counted in the first zone containing their bottom-centre point.
+    """
+    frames = len(offsets) - 1
+    zones = len(polygons)
+    if frames <= 0 or zones == 0:
+        return np.zeros((max(frames, 0), zones), dtype=np.int64)
+    h, w = frame_shape[:2]
+    owner = np.repeat(np.arange(frames), np.diff(offsets))
+
+    x1, y1, x2, y2 = boxes[:, :4].T
+    areas = np.maximum(0.0, (x2 - x1) * (y2 - y1)).astype(np.float64)
+    keep = areas >= min_box_area_ratio * (w * h)
+    points = np.stack([((x1 + x2) / 2).astype(np.int64), y2.astype(np.int64)], axis=1)[keep]
+
+    labels = (zone_mask or ZoneMask()).assign(points, frame_shape, polygons)
+    inside = labels >= 0
+    flat = owner[keep][inside] * zones + labels[inside]
+    return np.bincount(flat, minlength=frames * zones).reshape(frames, zones)
+
+
+class StoredDetections:
+    """Cached per-frame detections of one video, ready to be counted against any zones"""
+
+    def __init__(self, video_path: str, data_dir: Optional[Path] = None):
+        import cv2
+        self.video_path = video_path
+        self.data_dir = Path(data_dir) if data_dir else Path(__file__).parent.parent / 'data'
+        self.cache_path = find_cache(self.data_dir / 'detection_cache', video_path)
+        if self.cache_path is None:
+            raise FileNotFoundError(f"No cached detections for {video_path}; run detection with --detection-cache first")
+        self.frames, self.offsets, self.boxes, self.metadata = read_cache(self.cache_path)
+
+        cap = cv2.VideoCapture(video_path)
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)))
+        cap.release()
+        self.zone_mask = ZoneMask()
+
+        # Boxes from an ROI-cropped run only cover the zones of that run
+        self.roi_limited = bool(self.metadata.get('settings', {}).get('roi'))
+
+    def counts(self, polygons: List, min_box_area_ratio: float = 0.003) -> np.ndarray:
+        return count_series(self.offsets, self.boxes, polygons, self.frame_shape,
+                            min_box_area_ratio, self.zone_mask)
+
+    def preview(self, polygons: List) -> List[Dict]:
+        """Mean and peak raw count per zone over the whole video, for a quick what-if"""
+        counts = self.counts(polygons)
+        if len(counts) == 0:
+            return [{'mean': 0.0, 'max': 0} for _ in polygons]
+        return [{'mean': float(counts[:, i].mean()), 'max': int(counts[:, i].max())}
+                for i in range(len(polygons))]
+
+
+def rezone(video_path: str, polygons: List, data_dir: Optional[Path] = None, smooth_window: int = 5,
+           smooth_filter: str = 'mean', best_queue_hysteresis: float = 0.0,
+           min_box_area_ratio: float = 0.003, stored: Optional[StoredDetections] = None) -> Dict[str, np.ndarray]:
+    """Time series (counts, smoothing, waits, recommendations) for new polygons from cached detections"""
+    stored = stored or StoredDetections(video_path, data_dir)
+    counts = stored.counts(polygons, min_box_area_ratio)
+    timestamps = stored.frames / stored.fps
+    smoothed = smooth_series(counts, smooth_window, smooth_filter)
+    waits = replay_waits(smoothed, timestamps, ServiceRateEstimator(len(polygons)))
+    best, worst = rank_series(waits, smoothed, best_queue_hysteresis)
+    return {
+        'frame_index': stored.frames.astype(np.int64),
+        'timestamps': timestamps.astype(np.float64),
+        'counts': counts.astype(np.int16),
+        'smoothed': smoothed.astype(np.int16),
+        'expected_wait_minutes': waits,
+        'best_queue': best,
+        'worst_queue': worst,
+    }
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Recompute queue counts for new zones from cached detections')
+    parser.add_argument('--video', type=str, required=True, help='Path to video file')
+    parser.add_argument('--polygons', type=str, default=None,
+                       help='polygons.json with the new zones (default: data/polygons.json)')
+    parser.add_argument('--output', type=str, default=None,
+                       help='Time-series file (default: data/rezone_<video>.npz)')
+    parser.add_argument('--smooth-window', type=int, default=5, help='Frames averaged by the count smoother')
+    parser.add_argument('--smooth-filter', type=str, default='mean', choices=list(FILTERS),
+                       help='Count smoothing filter')
+    parser.add_argument('--best-queue-hysteresis', type=float, default=0.0,
+                       help='Keep the current best queue unless another beats it by more than this')
+    args = parser.parse_args()
+
+    data_dir = Path(__file__).parent.parent / 'data'
+    polygon_file = Path(args.polygons) if args.polygons else data_dir / 'polygons.json'
+    with open(polygon_file) as f:
+        polygons = json.load(f)['polygons']
+
+    started = time.time()
+    try:
+        stored = StoredDetections(args.video, data_dir)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        return
+    if stored.roi_limited:
+        print("⚠️ Detections were cropped to the old zones (--roi-crop); people outside them are missing")
+
+    series = rezone(args.video, polygons, smooth_window=args.smooth_window, smooth_filter=args.smooth_filter,
+                    best_queue_hysteresis=args.best_queue_hysteresis, stored=stored)
+    summary = summarize(series, time.time() - started)
+    output_path = Path(args.output) if args.output else data_dir / f"rezone_{Path(args.video).stem}.npz"
+    save_timeseries(output_path, series, {
+        'video_path': args.video,
+        'polygons': polygons,
+        'detections': str(stored.cache_path),
+        'summary': summary,
+    })
+    print_summary(summary, output_path)
+
+
+if __name__ == '__main__':
+    main()
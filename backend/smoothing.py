@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Queue count smoothing for QueueGuidance Web
+O(1)-per-update streaming filters over a fixed (window, zones) NumPy ring buffer
+"""
+
+import numpy as np
+from typing import List
+
+FILTERS = ('mean', 'ema', 'median', 'hampel')
+
+
+class CountSmoother:
+    """Smooth per-zone counts to reduce frame-to-frame jitter"""
+    
+    def __init__(self, num_zones: int, window: int = 5, method: str = 'mean',
+                 alpha: float = 0.5, hampel_sigmas: float = 3.0):
+        if method not in FILTERS:
+            raise ValueError(f"Unknown smoothing filter '{method}', choose from {', '.join(FILTERS)}")
+        self.window = max(1, window)
+        self.method = method
+        # EMA weight of the newest sample
+        self.alpha = alpha
+        # Hampel: replace samples further than this many robust sigmas from the median
+        self.hampel_sigmas = hampel_sigmas
+        self.reset(num_zones)
+    
+    def reset(self, num_zones: int):
+        self.num_zones = num_zones
+        self.buffer = np.zeros((self.window, num_zones), dtype=np.int64)
+        self.running_sum = np.zeros(num_zones, dtype=np.int64)
+        self.ema = None
+        self.filled = 0
+        self.head = 0
+    
+    def update(self, counts: List[int]) -> List[int]:
+        """Add one frame of raw counts and return the smoothed counts"""
+        counts = np.asarray(counts, dtype=np.int64)
+        if len(counts) != self.num_zones:
+            self.reset(len(counts))
+        
+        # Ring buffer: overwrite the oldest row, keep the running sum in step
+        self.running_sum += counts - self.buffer[self.head]
+        self.buffer[self.head] = counts
+        self.head = (self.head + 1) % self.window
+        self.filled = min(self.filled + 1, self.window)
+        
+        if self.method == 'mean':
+            smoothed = self.running_sum / self.filled
+        elif self.method == 'ema':
+            self.ema = counts.astype(np.float64) if self.ema is None else \
+                self.alpha * counts + (1.0 - self.alpha) * self.ema
+            smoothed = self.ema
+        else:
+            history = self.buffer[:self.filled]
+            median = np.median(history, axis=0)
+            if self.method == 'median':
+                smoothed = median
+            else:
+                # Counts are integers, so floor the MAD to stop +-1 changes being outliers
+                mad = np.maximum(np.median(np.abs(history - median), axis=0), 0.5)
+                outlier = np.abs(counts - median) > self.hampel_sigmas * 1.4826 * mad
+                smoothed = np.where(outlier, median, counts)
+        
+        return np.rint(smoothed).astype(np.int64).tolist()
+
+
+def smooth_series(counts: np.ndarray, window: int = 5, method: str = 'mean',
+                  alpha: float = 0.5, hampel_sigmas: float = 3.0) -> np.ndarray:
+    """Whole-series equivalent of feeding each row of counts (frames, zones) to a CountSmoother"""
+    if method not in FILTERS:
+        raise ValueError(f"Unknown smoothing filter '{method}', choose from {', '.join(FILTERS)}")
+    counts = np.asarray(counts, dtype=np.int64)
+    window = max(1, window)
+    frames = len(counts)
+    if frames == 0:
+        return counts.copy()
+    
+    if method == 'ema':
+        # Recursive, so one vector step per frame
+        smoothed = np.empty(counts.shape, dtype=np.float64)
+        smoothed[0] = counts[0]
+        for i in range(1, frames):
+            smoothed[i] = alpha * counts[i] + (1.0 - alpha) * smoothed[i - 1]
+        return np.rint(smoothed).astype(np.int64)
+    
+    filled = np.minimum(np.arange(1, frames + 1), window)
+    if method == 'mean':
+        cumulative = np.cumsum(counts, axis=0)
+        sums = cumulative.copy()
+        sums[window:] -= cumulative[:-window]
+        return np.rint(sums / filled[:, None]).astype(np.int64)
+    
+    # Median filters: the first window-1 rows see a shorter history
+    medians = np.empty(counts.shape, dtype=np.float64)
+    mads = np.empty(counts.shape, dtype=np.float64)
+    warmup = min(window - 1, frames)
+    for i in range(warmup):
+        history = counts[:i + 1]
+        medians[i] = np.median(history, axis=0)
+        mads[i] = np.median(np.abs(history - medians[i]), axis=0)
+    if frames >= window:
+        # (frames - window + 1, zones, window) view of every full trailing window
+        windows = np.lib.stride_tricks.sliding_window_view(counts, window, axis=0)
+        medians[warmup:] = np.median(windows, axis=-1)
+        mads[warmup:] = np.median(np.abs(windows - medians[warmup:, :, None]), axis=-1)
+    if method == 'median':
+        return np.rint(medians).astype(np.int64)
+    mads = np.maximum(mads, 0.5)
+    outlier = np.abs(counts - medians) > hampel_sigmas * 1.4826 * mads
+    return np.rint(np.where(outlier, medians, counts)).astype(np.int64)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Stand-in live camera for QueueGuidance Web
+Serves a video file as an MJPEG-over-HTTP stream in real time, looping, so the
+live stream source can be tested (including reconnects) without a real camera
+"""
+
+import sys
+import cv2
+import socketserver
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from frame_sources import VideoFileSource, PlaybackPacer
+
+BOUNDARY = 'queueguidanceframe'
+
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    """Every client gets its own real-time playback of the file"""
+
+    def do_GET(self):
+        server = self.server
+        source = VideoFileSource(server.video_path, loop=True, pacer=PlaybackPacer('multiplier', server.speed))
+        self.send_response(200)
+        self.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        sent = 0
+        try:
+            while source.grab():
+                frame = source.retrieve()
+                if frame is None:
+                    continue
+                ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, server.quality])
+                if not ok:
+                    continue
+                self.wfile.write(f'--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n'
+                                 f'Content-Length: {len(jpeg)}\r\n\r\n'.encode())
+                self.wfile.write(jpeg.tobytes())
+                self.wfile.write(b'\r\n')
+                sent += 1
+                # Simulate a camera dropping the connection
+                if server.disconnect_after and sent >= server.disconnect_after:
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            source.release()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def serve(video_path: str, host: str = '127.0.0.1', port: int = 8090, speed: float = 1.0,
+          quality: int = 80, disconnect_after: int = 0):
+    """Serve video_path at http://host:port/ until interrupted"""
+    server = _ThreadingHTTPServer((host, port), _StreamHandler)
+    server.video_path = video_path
+    server.speed = speed
+    server.quality = quality
+    server.disconnect_after = disconnect_after
+    print(f"📡 Streaming {video_path} at http://{host}:{port}/stream.mjpg")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve a video file as a live MJPEG camera')
+    parser.add_argument('--video', type=str, required=True, help='Path to video file')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8090, help='Port to listen on')
+    parser.add_argument('--speed', type=float, default=1.0, help='Playback speed (1 = real time)')
+    parser.add_argument('--quality', type=int, default=80, help='JPEG quality')
+    parser.add_argument('--disconnect-after', type=int, default=0,
+                       help='Drop each client after N frames to exercise reconnects (0 = never)')
+    args = parser.parse_args()
+
+    serve(args.video, args.host, args.port, args.speed, args.quality, args.disconnect_after)
+
+
+if __name__ == '__main__':
+    main()
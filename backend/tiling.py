@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tiled inference helpers for QueueGuidance Web
+Split high-resolution frames into overlapping tiles and merge the boxes back
+"""
+
+import numpy as np
+from typing import List, Tuple
+
+
+def _tile_starts(start: int, end: int, tile: int, step: int) -> List[int]:
+    """Tile origins along one axis, the last tile flush with the end"""
+    if end - start <= tile:
+        return [start]
+    starts = list(range(start, end - tile, step))
+    starts.append(end - tile)
+    return starts
+
+
+def tile_grid(rect: Tuple[int, int, int, int], tile_size: int, overlap: float) -> List[Tuple[int, int, int, int]]:
+    """Overlapping (x0, y0, x1, y1) tiles covering rect"""
+    x0, y0, x1, y1 = rect
+    step = max(1, int(tile_size * (1.0 - overlap)))
+    return [
+        (tx, ty, min(tx + tile_size, x1), min(ty + tile_size, y1))
+        for ty in _tile_starts(y0, y1, tile_size, step)
+        for tx in _tile_starts(x0, x1, tile_size, step)
+    ]
+
+
+def non_max_suppression(boxes: np.ndarray, iou_threshold: float = 0.5) -> np.ndarray:
+    """Greedy NMS over an (N, 5) [x1, y1, x2, y2, conf] array, highest confidence first"""
+    if len(boxes) < 2:
+        return boxes
+    
+    order = np.argsort(-boxes[:, 4], kind='stable')
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.maximum(0.0, x2 - x1) * np.maximum(0.0, y2 - y1)
+    
+    keep = []
+    while len(order):
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        iw = np.maximum(0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+        ih = np.maximum(0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+        inter = iw * ih
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_threshold]
+    
+    return boxes[np.sort(keep)]
+
+
+def _cut_by_tile(boxes: np.ndarray, tile: Tuple[int, int, int, int], rect: Tuple[int, int, int, int],
+                 margin: float) -> np.ndarray:
+    """True for boxes touching an edge of the tile that lies inside rect (the person goes on)"""
+    tx0, ty0, tx1, ty1 = tile
+    x0, y0, x1, y1 = rect
+    cut = np.zeros(len(boxes), dtype=bool)
+    if tx0 > x0:
+        cut |= boxes[:, 0] <= tx0 + margin
+    if ty0 > y0:
+        cut |= boxes[:, 1] <= ty0 + margin
+    if tx1 < x1:
+        cut |= boxes[:, 2] >= tx1 - margin
+    if ty1 < y1:
+        cut |= boxes[:, 3] >= ty1 - margin
+    return cut
+
+
+def _pairwise_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU of a[i] and b[i] broadcast over (N, N, 4) box pairs"""
+    iw = np.maximum(0.0, np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]))
+    ih = np.maximum(0.0, np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]))
+    inter = iw * ih
+    area_a = np.maximum(0.0, a[..., 2] - a[..., 0]) * np.maximum(0.0, a[..., 3] - a[..., 1])
+    area_b = np.maximum(0.0, b[..., 2] - b[..., 0]) * np.maximum(0.0, b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
+
+
+def _clip(boxes: np.ndarray, region: np.ndarray) -> np.ndarray:
+    return np.concatenate([np.maximum(boxes[..., :2], region[..., :2]),
+                           np.minimum(boxes[..., 2:4], region[..., 2:4])], axis=-1)
+
+
+def merge_tile_boxes(parts: List[Tuple[np.ndarray, Tuple[int, int, int, int]]], rect: Tuple[int, int, int, int],
+                     iou_threshold: float = 0.5, margin: float = 2.0) -> np.ndarray:
+    """Merge (boxes, tile) pairs in frame coordinates into one (N, 5) array.
+    
+    A box touching an inner tile edge is only the part of a person inside that
+    tile, so it is compared with boxes from other tiles only inside the area both
+    tiles see. Chains of such matches (a person spanning several tiles) become one
+    box covering all pieces; whole-box duplicates keep the most confident box.
+    """
+    parts = [(boxes, tile) for boxes, tile in parts if len(boxes)]
+    if not parts:
+        return np.zeros((0, 5), dtype=np.float32)
+    boxes = np.concatenate([boxes for boxes, _ in parts]).astype(np.float32)
+    tiles = np.concatenate([np.tile(np.asarray(tile, dtype=np.float32), (len(b), 1)) for b, tile in parts])
+    cut = np.concatenate([_cut_by_tile(b, tile, rect, margin) for b, tile in parts])
+    
+    xyxy = boxes[:, :4]
+    a, b = xyxy[:, None], xyxy[None, :]
+    shared = _clip(tiles[:, None], tiles[None, :])
+    partial = cut[:, None] | cut[None, :]
+    same = np.where(partial, _pairwise_iou(_clip(a, shared), _clip(b, shared)), _pairwise_iou(a, b)) > iou_threshold
+    
+    # Connected components of the "same person" graph
+    label = np.arange(len(boxes))
+    while True:
+        merged = np.where(same, label[None, :], len(boxes)).min(axis=1)
+        merged = np.minimum(merged, label)
+        if np.array_equal(merged, label):
+            break
+        label = merged[merged]
+    
+    kept = []
+    for group in np.unique(label):
+        members = np.flatnonzero(label == group)
+        best = boxes[members[np.argmax(boxes[members, 4])]].copy()
+        if cut[members].any():
+            best[:2] = xyxy[members, :2].min(axis=0)
+            best[2:4] = xyxy[members, 2:4].max(axis=0)
+        kept.append(best)
+    return np.stack(kept)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Person tracking for QueueGuidance Web
+ByteTrack-style IoU association with a constant-velocity motion model (CPU only),
+so YOLO can run every Nth frame and boxes are propagated in between
+"""
+
+import numpy as np
+from typing import List
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between (N, 4+) and (M, 4+) xyxy boxes"""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float64)
+    a = a[:, None, :4].astype(np.float64)
+    b = b[None, :, :4].astype(np.float64)
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
+
+
+def greedy_match(iou: np.ndarray, threshold: float):
+    """Pairs (row, col) by descending IoU above threshold, each used once"""
+    pairs = []
+    if iou.size == 0:
+        return pairs
+    rows, cols = np.nonzero(iou >= threshold)
+    order = np.argsort(-iou[rows, cols], kind='stable')
+    used_rows, used_cols = set(), set()
+    for k in order:
+        r, c = int(rows[k]), int(cols[k])
+        if r in used_rows or c in used_cols:
+            continue
+        pairs.append((r, c))
+        used_rows.add(r)
+        used_cols.add(c)
+    return pairs
+
+
+class Track:
+    """One tracked person: box, per-second box velocity and bookkeeping"""
+    
+    __slots__ = ('track_id', 'box', 'velocity', 'conf', 'hits', 'last_seen', 'last_time', 'matched')
+    
+    def __init__(self, track_id: int, box: np.ndarray, timestamp: float):
+        self.track_id = track_id
+        self.box = box[:4].astype(np.float64)
+        self.velocity = np.zeros(4, dtype=np.float64)
+        self.conf = float(box[4])
+        self.hits = 1
+        self.last_seen = timestamp
+        self.last_time = timestamp
+        self.matched = True
+    
+    def predict(self, timestamp: float):
+        """Move the box along its velocity to the given time"""
+        dt = timestamp - self.last_time
+        if dt > 0:
+            self.box = self.box + self.velocity * dt
+            self.last_time = timestamp
+    
+    def update(self, box: np.ndarray, timestamp: float, smoothing: float):
+        """Correct the track with a matched detection"""
+        dt = timestamp - self.last_seen
+        observed = box[:4].astype(np.float64)
+        if dt > 0:
+            # Velocity from the last detection, not the propagated box
+            measured = (observed - (self.box - self.velocity * (self.last_time - self.last_seen))) / dt
+            self.velocity += smoothing * (measured - self.velocity)
+        self.box = observed
+        self.conf = float(box[4])
+        self.hits += 1
+        self.last_seen = timestamp
+        self.last_time = timestamp
+        self.matched = True
+
+
+class PersonTracker:
+    """Two-stage (high then low confidence) IoU tracker with persistent person IDs"""
+    
+    def __init__(self, high_conf: float = 0.4, match_iou: float = 0.3, max_lost: float = 2.0,
+                 min_hits: int = 2, velocity_smoothing: float = 0.5):
+        # Only detections above high_conf can start new tracks
+        self.high_conf = high_conf
+        self.match_iou = match_iou
+        # Seconds a track survives without a matching detection
+        self.max_lost = max_lost
+        self.min_hits = min_hits
+        self.velocity_smoothing = velocity_smoothing
+        self.tracks: List[Track] = []
+        self.next_id = 1
+    
+    def predict(self, timestamp: float):
+        """Propagate every track to timestamp with the motion model"""
+        for track in self.tracks:
+            track.predict(timestamp)
+    
+    def update(self, boxes: np.ndarray, timestamp: float):
+        """Associate one frame's (N, 5) detections with the existing tracks"""
+        self.predict(timestamp)
+        for track in self.tracks:
+            track.matched = False
+        
+        high = boxes[boxes[:, 4] >= self.high_conf]
+        low = boxes[boxes[:, 4] < self.high_conf]
+        
+        # Stage 1: confident detections against all tracks
+        track_boxes = np.array([t.box for t in self.tracks]).reshape(-1, 4)
+        pairs = greedy_match(iou_matrix(track_boxes, high), self.match_iou)
+        for r, c in pairs:
+            self.tracks[r].update(high[c], timestamp, self.velocity_smoothing)
+        unmatched_high = sorted(set(range(len(high))) - {c for _, c in pairs})
+        
+        # Stage 2: weak detections only keep remaining tracks alive (occlusions)
+        remaining = [i for i, t in enumerate(self.tracks) if not t.matched]
+        if remaining and len(low):
+            rest_boxes = np.array([self.tracks[i].box for i in remaining]).reshape(-1, 4)
+            for r, c in greedy_match(iou_matrix(rest_boxes, low), self.match_iou):
+                self.tracks[remaining[r]].update(low[c], timestamp, self.velocity_smoothing)
+        
+        # Drop tracks lost for too long, start new ones
+        self.tracks = [t for t in self.tracks if t.matched or timestamp - t.last_seen <= self.max_lost]
+        for c in unmatched_high:
+            self.tracks.append(Track(self.next_id, high[c], timestamp))
+            self.next_id += 1
+    
+    def active(self):
+        """(M, 5) boxes and (M,) IDs of confirmed tracks seen on the last detection pass"""
+        active = [t for t in self.tracks if t.matched and t.hits >= self.min_hits]
+        boxes = np.array([np.append(t.box, t.conf) for t in active], dtype=np.float32).reshape(-1, 5)
+        ids = np.array([t.track_id for t in active], dtype=np.int64)
+        return boxes, ids
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Queue zone geometry for QueueGuidance Web
+Vectorized person-to-queue assignment against the polygons in polygons.json
+"""
+
+import numpy as np
+from typing import List, Tuple
+
+
+def points_in_polygon(points: np.ndarray, polygon) -> np.ndarray:
+    """Ray-casting test for many points at once, same rules as WebQueueDetector.point_in_polygon"""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    x, y = points[:, 0], points[:, 1]
+    inside = np.zeros(len(points), dtype=bool)
+    
+    n = len(polygon)
+    p1x, p1y = polygon[0]
+    for i in range(1, n + 1):
+        p2x, p2y = polygon[i % n]
+        crosses = (y > min(p1y, p2y)) & (y <= max(p1y, p2y)) & (x <= max(p1x, p2x))
+        # Horizontal edges can never satisfy both y bounds above
+        if p1y != p2y:
+            if p1x != p2x:
+                xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+                crosses &= x <= xinters
+            inside ^= crosses
+        p1x, p1y = p2x, p2y
+    
+    return inside
+
+
+def assign_zones(points: np.ndarray, polygons: List) -> np.ndarray:
+    """Queue index for each point (-1 if none), first matching polygon wins"""
+    points = np.asarray(points).reshape(-1, 2)
+    labels = np.full(len(points), -1, dtype=np.int64)
+    
+    for i, polygon in enumerate(polygons):
+        unassigned = labels < 0
+        if not unassigned.any():
+            break
+        hits = points_in_polygon(points[unassigned], polygon)
+        labels[np.flatnonzero(unassigned)[hits]] = i
+    
+    return labels
+
+
+class ZoneMask:
+    """Integer label raster of the queue polygons for O(1) person-to-queue lookups"""
+    
+    def __init__(self, scale: int = 1, chunk_rows: int = 256):
+        # scale > 1 stores a downscaled raster (1 cell per scale x scale pixels)
+        self.scale = max(1, int(scale))
+        self.chunk_rows = chunk_rows
+        self.labels = None
+        self._key = None
+    
+    def _build(self, frame_shape, polygons):
+        """Rasterize polygons so each cell holds 1 + queue index (0 = no queue)"""
+        h, w = frame_shape[:2]
+        s = self.scale
+        rows, cols = -(-h // s), -(-w // s)
+        dtype = np.uint8 if len(polygons) < 255 else np.uint16
+        labels = np.zeros((rows, cols), dtype=dtype)
+        
+        for i, polygon in enumerate(polygons):
+            pts = np.asarray(polygon, dtype=np.float64)
+            c0 = max(0, int(np.floor(pts[:, 0].min() / s)))
+            c1 = min(cols, int(np.ceil(pts[:, 0].max() / s)) + 1)
+            r0 = max(0, int(np.floor(pts[:, 1].min() / s)))
+            r1 = min(rows, int(np.ceil(pts[:, 1].max() / s)) + 1)
+            if c0 >= c1 or r0 >= r1:
+                continue
+            
+            # Sample at the pixel the cell starts on so scale=1 is exact
+            xs = np.arange(c0, c1) * s
+            for r in range(r0, r1, self.chunk_rows):
+                r_end = min(r1, r + self.chunk_rows)
+                gx, gy = np.meshgrid(xs, np.arange(r, r_end) * s)
+                inside = points_in_polygon(np.stack([gx.ravel(), gy.ravel()], axis=1), polygon)
+                block = labels[r:r_end, c0:c1]
+                # First polygon wins: never overwrite an already labelled cell
+                block[inside.reshape(block.shape) & (block == 0)] = i + 1
+        
+        return labels
+    
+    def ensure(self, frame_shape, polygons):
+        """Rebuild the raster if the frame size or the polygons changed"""
+        key = (tuple(frame_shape[:2]), tuple(tuple(map(tuple, p)) for p in polygons))
+        if key != self._key:
+            self.labels = self._build(frame_shape, polygons)
+            self._key = key
+        return self.labels
+    
+    def assign(self, points: np.ndarray, frame_shape, polygons: List) -> np.ndarray:
+        """Queue index for each integer point (-1 if none) via a single array lookup"""
+        labels_raster = self.ensure(frame_shape, polygons)
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        h, w = frame_shape[:2]
+        
+        in_frame = (points[:, 0] >= 0) & (points[:, 0] < w) & (points[:, 1] >= 0) & (points[:, 1] < h)
+        labels = np.full(len(points), -1, dtype=np.int64)
+        inside = points[in_frame] // self.scale
+        labels[in_frame] = labels_raster[inside[:, 1], inside[:, 0]].astype(np.int64) - 1
+        
+        # Anchors on or past the frame edge fall back to the exact polygon test
+        if not in_frame.all():
+            labels[~in_frame] = assign_zones(points[~in_frame], polygons)
+        return labels
+
+
+def zones_bounding_rect(polygons: List, frame_shape, margin: float = 0.0) -> Tuple[int, int, int, int]:
+    """Union bounding rectangle (x0, y0, x1, y1) of all polygons, padded and clamped to the frame"""
+    h, w = frame_shape[:2]
+    if not polygons:
+        return 0, 0, w, h
+    
+    pts = np.concatenate([np.asarray(p, dtype=np.float64).reshape(-1, 2) for p in polygons])
+    pad_x, pad_y = margin * w, margin * h
+    x0 = max(0, int(np.floor(pts[:, 0].min() - pad_x)))
+    y0 = max(0, int(np.floor(pts[:, 1].min() - pad_y)))
+    x1 = min(w, int(np.ceil(pts[:, 0].max() + pad_x)) + 1)
+    y1 = min(h, int(np.ceil(pts[:, 1].max() + pad_y)) + 1)
+    if x1 <= x0 or y1 <= y0:
+        return 0, 0, w, h
+    return x0, y0, x1, y1
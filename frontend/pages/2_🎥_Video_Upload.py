@@ -598,26 +598,34 @@ if st.session_state.polygons_drawn:
                         video_name = Path(st.session_state.current_video).name
                         video_full_path = project_root / 'data' / video_name
                         
-                        # Get Python executable
-                        python_exe = sys.executable
+                        # Prefer the warm detector daemon started by run.py
+                        sys.path.insert(0, str(project_root / 'backend'))
+                        from model_server import send_command
+                        reply = send_command({'cmd': 'start', 'video': str(video_full_path)})
                         
-                        # Build command with headless flag to hide video window
-                        cmd = [python_exe, str(backend_path), 
-                               '--video', str(video_full_path), 
-                               '--mode', 'detect',
-                               '--headless']
-                        
-                        # Hide CMD window on Windows
-                        startupinfo = subprocess.STARTUPINFO()
-                        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                        startupinfo.wShowWindow = subprocess.SW_HIDE
-                        
-                        # Start process hidden in background
-                        subprocess.Popen(cmd, 
-                                       startupinfo=startupinfo,
-                                       cwd=str(project_root),
-                                       stdout=subprocess.PIPE,
-                                       stderr=subprocess.PIPE)
+                        if reply is None:
+                            # No daemon running: launch a one-off detector process
+                            python_exe = sys.executable
+                            
+                            # Build command with headless flag to hide video window
+                            cmd = [python_exe, str(backend_path), 
+                                   '--video', str(video_full_path), 
+                                   '--mode', 'detect',
+                                   '--headless']
+                            
+                            # Hide CMD window on Windows
+                            startupinfo = subprocess.STARTUPINFO()
+                            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+                            startupinfo.wShowWindow = subprocess.SW_HIDE
+                            
+                            # Start process hidden in background
+                            subprocess.Popen(cmd, 
+                                           startupinfo=startupinfo,
+                                           cwd=str(project_root),
+                                           stdout=subprocess.PIPE,
+                                           stderr=subprocess.PIPE)
+                        elif not reply.get('ok'):
+                            raise RuntimeError(reply.get('error', 'Detector daemon rejected the job'))
                         
                         st.success('✅ Detection system active in background!')
                         st.session_state.detection_running = True
@@ -631,15 +639,70 @@ if st.session_state.polygons_drawn:
     with col2:
         if st.session_state.detection_running:
             if st.button('🛑 Stop', use_container_width=True):
-                subprocess.run('taskkill /F /IM python.exe /FI "WINDOWTITLE eq *detection*"', 
-                             shell=True, capture_output=True)
+                sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'backend'))
+                from model_server import send_command
+                if send_command({'cmd': 'stop'}) is None:
+                    subprocess.run('taskkill /F /IM python.exe /FI "WINDOWTITLE eq *detection*"', 
+                                 shell=True, capture_output=True)
                 st.session_state.detection_running = False
                 st.rerun()
     
     with col3:
         if st.button('� Dashboard', use_container_width=True):
             st.switch_page("pages/3_🧠_Live_Dashboard.py")
-    
+
+    # Offline analysis: one fast pass over the file producing a time series
+    with st.expander("📈 Offline Analysis"):
+        st.markdown("Process the whole video once, as fast as possible, and save queue counts over time.")
+        project_root = Path(__file__).parent.parent.parent
+        progress_file = project_root / 'data' / 'analysis_progress.json'
+
+        if st.button('📈 Analyze Video', use_container_width=True):
+            video_name = Path(st.session_state.current_video).name
+            cmd = [sys.executable, str(project_root / 'backend' / 'detection_engine.py'),
+                   '--video', str(project_root / 'data' / video_name),
+                   '--mode', 'analyze',
+                   '--headless']
+
+            # Hide CMD window on Windows
+            startupinfo = subprocess.STARTUPINFO()
+            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+            startupinfo.wShowWindow = subprocess.SW_HIDE
+
+            if progress_file.exists():
+                progress_file.unlink()
+            subprocess.Popen(cmd,
+                           startupinfo=startupinfo,
+                           cwd=str(project_root),
+                           stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+            st.info('⏳ Analysis started...')
+
+        if progress_file.exists():
+            try:
+                with open(progress_file, 'r') as f:
+                    progress = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                progress = {}
+
+            if progress.get('status') == 'running':
+                st.progress(progress.get('progress') or 0.0)
+                eta = progress.get('eta_seconds')
+                st.caption(f"⚡ {progress.get('fps', 0)} frames/s | "
+                           f"ETA {f'{eta:.0f}s' if eta is not None else 'unknown'}")
+                if st.button('🔄 Refresh Progress', use_container_width=True):
+                    st.rerun()
+            elif progress.get('status') == 'done':
+                summary = progress.get('summary', {})
+                st.success(f"✅ {summary.get('samples', 0)} samples over {summary.get('video_seconds', 0)}s "
+                           f"of video in {summary.get('elapsed_seconds', 0)}s")
+                for queue in summary.get('queues', []):
+                    st.write(f"Queue {queue['queue']}: mean {queue['mean_count']}, "
+                             f"max {queue['max_count']} at {queue['peak_time_seconds']}s")
+                st.caption(f"💾 {progress.get('output')}")
+            elif progress.get('status') == 'error':
+                st.error(f"❌ Analysis failed: {progress.get('error')}")
+
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Final status and next steps
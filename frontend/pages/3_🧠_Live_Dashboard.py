@@ -905,7 +905,9 @@ if st.session_state.audio_enabled and AUDIO_AVAILABLE and PYGAME_AVAILABLE:
         
         if queue_counts and best_queue <= len(queue_counts):
             people = queue_counts[best_queue - 1]
-            wait_time = people * 2
+            # Backend estimate from measured service rates, else ~2 min per person
+            expected_waits = data.get('expected_wait_minutes')
+            wait_time = round(expected_waits[best_queue - 1]) if expected_waits else people * 2
             
             # Update timestamp BEFORE starting thread to prevent multiple triggers
             st.session_state.last_announcement_time = current_time
@@ -968,9 +970,16 @@ with col1:
         st.markdown('<div class="section-header"><h2 class="section-title">📹 Live Video Feed</h2></div>', unsafe_allow_html=True)
         if frame_path.exists():
             st.markdown('<div class="video-container">', unsafe_allow_html=True)
-            # Display image directly from path to avoid truncation issues
+            # Snapshots are swapped in atomically and queues.json names the JPEG on disk
+            # (frame_id), so the frame only needs re-reading when that changes; heartbeats
+            # bump seq but keep frame_id (older detectors write neither)
             try:
-                st.image(str(frame_path), use_column_width=True)
+                # mtime tells a restarted detector's frame_id 1 from the previous run's
+                frame_key = (data.get('frame_id', data.get('seq')), frame_path.stat().st_mtime_ns)
+                if frame_key[0] is None or frame_key != st.session_state.get('frame_seq') or 'frame_bytes' not in st.session_state:
+                    st.session_state.frame_bytes = frame_path.read_bytes()
+                    st.session_state.frame_seq = frame_key
+                st.image(st.session_state.frame_bytes, use_column_width=True)
             except Exception as e:
                 st.warning(f"📷 Video frame loading... ({str(e)[:50]})")
             
@@ -1037,14 +1046,16 @@ with col2:
     </div>
     """, unsafe_allow_html=True)
     
+    expected_waits = data.get('expected_wait_minutes')
     for i, count in enumerate(queue_counts):
         queue_num = i + 1
-        wait_time = count * 2  # Estimate
+        # Backend estimate from measured service rates, else ~2 min per person
+        wait_time = round(expected_waits[i]) if expected_waits else count * 2
         
         if queue_num == best_q:
             status = f"✅ {ui_text['best_choice']}"
             card_class = "queue-card best-queue"
-        elif count == max(queue_counts):
+        elif (queue_num == data.get('worst_queue')) if expected_waits else count == max(queue_counts):
             status = f"⚠️ {ui_text['avoid']}"
             card_class = "queue-card worst-queue"
         else:
@@ -1,2 +1,10 @@
 import os
-os.system('streamlit run frontend/app.py')
+import subprocess
+import sys
+
+# Long-lived detector daemon: loads the model once so detection jobs start warm
+server = subprocess.Popen([sys.executable, 'backend/model_server.py'])
+try:
+    os.system('streamlit run frontend/app.py')
+finally:
+    server.terminate()